@@ -0,0 +1,17 @@
+import pytest
+
+from ga_bench import build_inputs, instance_for_genes, load_engine
+from ga_problem import ProblemInstance
+
+
+# ProblemInstance of a seeded synthetic catalog with about `genes` genes (see ga_bench),
+# built from ga3.2's Subject and Section classes; keyword arguments go to ProblemInstance
+@pytest.fixture
+def synthetic_problem():
+    module = load_engine("ga3.2")
+
+    def build(genes, seed=0, **kwargs):
+        subjects, sections = build_inputs(module, "sections", instance_for_genes(genes, seed))
+        return ProblemInstance(subjects, sections, **kwargs)
+
+    return build
@@ -1,5 +1,4 @@
 import random
-import pandas as pd
 
 class Subject:
     def __init__(self, code, name, time_slots, days, room_avail, instructor_avail, num_students):
@@ -86,6 +85,8 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
     return max(population, key=lambda x: x.calculate_fitness())
 
 def export_to_excel(schedule, filename="schedule.xlsx"):
+    import pandas as pd  # Only needed to export
+
     time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
 
@@ -97,13 +98,14 @@ def export_to_excel(schedule, filename="schedule.xlsx"):
     df.to_excel(filename)
     print(f"Schedule saved to {filename}")
 
-# Example usage
-subjects = [
-    Subject("CS112", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Thursday"], ["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor A", "Instructor B"], 30),
-    Subject("CS113", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Friday"], ["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor B", "Instructor C"], 25),
-    Subject("CS114", "Programming 1", ["7:00", "9:00", "11:00"], ["Monday", "Thursday"],["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor C", "Instructor A"], 40),
-    # Add more subjects as needed
-]
-
-best_schedule = genetic_algorithm(subjects)
-export_to_excel(best_schedule)
+if __name__ == "__main__":
+    # Example usage
+    subjects = [
+        Subject("CS112", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Thursday"], ["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor A", "Instructor B"], 30),
+        Subject("CS113", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Friday"], ["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor B", "Instructor C"], 25),
+        Subject("CS114", "Programming 1", ["7:00", "9:00", "11:00"], ["Monday", "Thursday"],["CB 221", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227", "CB 228"], ["Instructor C", "Instructor A"], 40),
+        # Add more subjects as needed
+    ]
+
+    best_schedule = genetic_algorithm(subjects)
+    export_to_excel(best_schedule)
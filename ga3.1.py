@@ -1,8 +1,9 @@
 import random
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
+import numpy as np
+
+from ga_fitness import FitnessCache, count_conflicts, fitness_from_conflicts
+from ga_parallel import PoolEvaluator
+from ga_problem import SLOT_INDEX, ProblemInstance
 
 
 # Subject class representing each subject's details
@@ -19,8 +20,10 @@ class Subject:
 
 # Schedule class that manages the creation and optimization of the schedule
 class Schedule:
-    def __init__(self, subjects):
+    def __init__(self, subjects, problem=None):
         self.subjects = subjects
+        # Compiled lookup tables (subject index, start times, occupied slots) shared by the population
+        self.problem = problem if problem is not None else ProblemInstance(subjects)
         self.schedule = {}
 
     # Initializes the schedule with random assignments of time and room slots
@@ -35,79 +38,23 @@ class Schedule:
             for day in subject.days:
                 self.schedule[(subject.code, day)] = (time_slot, room)
 
-    # Generates all possible starting time slots for a subject based on its duration
+    # Gets all possible starting time slots for a duration from the precomputed tables
     def generate_time_slots(self, duration):
-        start_time = 7 * 60  # 7:00 AM in minutes
-        end_time = 21 * 60  # 9:00 PM in minutes
-        slots = []
-
-        # Duration in minutes
-        if duration == "1 hour and 30 mins":
-            slot_duration = 90
-        elif duration == "3 hours":
-            slot_duration = 180
-        elif duration == "5 hours":
-            slot_duration = 300
-        else:
-            raise ValueError("Invalid duration")
-
-        # Generate all starting time slots within operating hours
-        current_time = start_time
-        while current_time + slot_duration <= end_time:
-            hour = current_time // 60
-            minute = current_time % 60
-            slots.append(f"{hour:02d}:{minute:02d}")
-            current_time += 30  # Increment in 30-minute intervals
-
-        return slots
+        return self.problem.start_times(duration)
 
-    # Calculates the fitness score based on the number of conflicts in the schedule
+    # Calculates the fitness score based on the number of conflicts in the schedule, with the
+    # same vectorized count the generation loop scores the population with
     def calculate_fitness(self):
-        conflicts = 0
-        schedule_slots = {}
-
-        # Count conflicts in the schedule
-        for (subject_code, day), (start_time, room) in self.schedule.items():
-            duration = next(sub.duration for sub in self.subjects if sub.code == subject_code)
-            occupied_slots = self.get_occupied_slots(start_time, duration)
-
-            for slot in occupied_slots:
-                key = (slot, day, room)
-                if key in schedule_slots:
-                    conflicts += 1
-                schedule_slots[key] = subject_code
-
-        return 1 / (1 + conflicts)
+        return fitness_from_conflicts(count_conflicts(self.problem, self.problem.encode(self.schedule)))
 
-    # Gets all the time slots occupied by a subject based on its start time and duration
+    # Gets all the time slots occupied by a subject from the precomputed tables
     def get_occupied_slots(self, start_time, duration):
-        time_slots = []
-        hour, minute = map(int, start_time.split(':'))
-        total_minutes = hour * 60 + minute
-
-        if duration == "1 hour and 30 mins":
-            duration_minutes = 90
-        elif duration == "3 hours":
-            duration_minutes = 180
-        elif duration == "5 hours":
-            duration_minutes = 300
-        else:
-            raise ValueError("Invalid duration")
-
-        # Generate all time slots occupied by the subject
-        while duration_minutes > 0:
-            hour = total_minutes // 60
-            minute = total_minutes % 60
-            time_slots.append(f"{hour:02d}:{minute:02d}")
-            total_minutes += 30
-            duration_minutes -= 30
-
-        return time_slots
+        return self.problem.occupied_times(start_time, duration)
 
     # Mutates the schedule by randomly changing a subject's room or time
     def mutate(self):
         subject_code, day = random.choice(list(self.schedule.keys()))
-        subject = next((s for s in self.subjects if s.code == subject_code), None)
+        subject = self.problem.subject(subject_code)
         available_times = self.generate_time_slots(subject.duration)
         available_rooms = subject.room_avail
 
@@ -122,8 +69,8 @@ class Schedule:
 # Performs crossover between two parent schedules to produce offspring
 def crossover(parent1, parent2):
     crossover_point = random.randint(0, len(parent1.schedule) - 1)
-    child1 = Schedule(parent1.subjects)
-    child2 = Schedule(parent2.subjects)
+    child1 = Schedule(parent1.subjects, parent1.problem)
+    child2 = Schedule(parent2.subjects, parent2.problem)
 
     for i, key in enumerate(parent1.schedule.keys()):
         if i < crossover_point:
@@ -137,8 +84,20 @@ def crossover(parent1, parent2):
 
 
 # Main genetic algorithm function to optimize the schedule
-def genetic_algorithm(subjects, population_size=100, generations=1000):
-    population = [Schedule(subjects) for _ in range(population_size)]
+def genetic_algorithm(subjects, population_size=100, generations=1000, cache=None, workers=None, seed=None):
+    if seed is not None:
+        random.seed(seed)
+    problem = ProblemInstance(subjects)
+    if workers is not None and workers > 1:
+        with PoolEvaluator(problem, workers) as evaluator:
+            return evolve(subjects, problem, population_size, generations, cache, evaluator)
+    return evolve(subjects, problem, population_size, generations, cache)
+
+
+# Generation loop of genetic_algorithm; evaluator (e.g. a PoolEvaluator) scores new schedules
+def evolve(subjects, problem, population_size, generations, cache=None, evaluator=None):
+    cache = cache if cache is not None else FitnessCache()
+    population = [Schedule(subjects, problem) for _ in range(population_size)]
 
     # Initialize each schedule in the population
     for schedule in population:
@@ -146,7 +105,10 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
 
     # Run the algorithm for the specified number of generations
     for generation in range(generations):
-        population = sorted(population, key=lambda x: x.calculate_fitness(), reverse=True)
+        # Score the whole population in one batched pass, reusing cached scores of
+        # schedules seen before; fewest conflicts first
+        conflicts = cache.evaluate(problem, np.stack([problem.encode(x.schedule) for x in population]), evaluator)
+        population = [population[i] for i in np.argsort(conflicts, kind='stable')]
         next_generation = population[:population_size // 2]
 
         # Generate new offspring
@@ -164,11 +126,15 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
         population = next_generation
 
     # Return the best schedule
-    return max(population, key=lambda x: x.calculate_fitness())
+    conflicts = cache.evaluate(problem, np.stack([problem.encode(x.schedule) for x in population]), evaluator)
+    return population[int(np.argmin(conflicts))]
 
 
 # Exports the optimized schedule to an Excel file with merged cells based on duration
 def export_to_excel(schedule, filename="schedule2.xlsx"):
+    from openpyxl import Workbook  # Only needed to export
+    from openpyxl.styles import Alignment
+
     time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
 
@@ -184,8 +150,8 @@ def export_to_excel(schedule, filename="schedule2.xlsx"):
 
     # Fill the schedule in the Excel sheet and merge cells based on duration
     for (subject_code, day), (start_time, room) in schedule.schedule.items():
-        subject = next((s for s in schedule.subjects if s.code == subject_code), None)
-        start_row = time_slots.index(start_time) + 2
+        subject = schedule.problem.subject(subject_code)
+        start_row = SLOT_INDEX[start_time] + 2
         occupied_slots = schedule.get_occupied_slots(start_time, subject.duration)
         end_row = start_row + len(occupied_slots) - 1
         col = days.index(day) + 2
@@ -200,18 +166,18 @@ def export_to_excel(schedule, filename="schedule2.xlsx"):
     print(f"Schedule saved to {filename}")
 
 
-# Example usage with sample subjects
-subjects = [
-
-    Subject("GE119", "Living in an IT Era (with MOS Certificate)", "1 hour and 30 mins", ["Tuesday", "Friday"], ["CB 222", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227"], ["Instructor B"],40),
-    Subject("CS471", "Principles of Operating System", "3 hours", ["Monday", "Thursday"], ["CB 222", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227"], ["Instructor C"], 20),
-    Subject("CS470", "Research (CS Thesis Writing 2)", "1 hour and 30 mins", ["Tuesday", "Friday"], ["CB 305", "CB 304"], ["Instructor D"], 35),
-    Subject("CB472-EL4", "Computational Science (with Certification for AI Professionals-Part 2)", "5 hours", ["Wednesday"], ["CB 305", "CB 304"], ["Instructor E"], 20),
-    Subject("CS172", "Probability and Statistics", "1 hour and 30 mins", ["Monday", "Thursday"], ["CB 321", "CB 322", "CB 323", "CB 324", "CB 325", "CB 326", "CB 327"], ["Instructor A"], 30),
-    # Add more subjects as needed
-]
+if __name__ == "__main__":
+    # Example usage with sample subjects
+    subjects = [
 
-# Run the genetic algorithm and export the best schedule
-best_schedule = genetic_algorithm(subjects)
-export_to_excel(best_schedule)
+        Subject("GE119", "Living in an IT Era (with MOS Certificate)", "1 hour and 30 mins", ["Tuesday", "Friday"], ["CB 222", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227"], ["Instructor B"],40),
+        Subject("CS471", "Principles of Operating System", "3 hours", ["Monday", "Thursday"], ["CB 222", "CB 223", "CB 224", "CB 225", "CB 226", "CB 227"], ["Instructor C"], 20),
+        Subject("CS470", "Research (CS Thesis Writing 2)", "1 hour and 30 mins", ["Tuesday", "Friday"], ["CB 305", "CB 304"], ["Instructor D"], 35),
+        Subject("CB472-EL4", "Computational Science (with Certification for AI Professionals-Part 2)", "5 hours", ["Wednesday"], ["CB 305", "CB 304"], ["Instructor E"], 20),
+        Subject("CS172", "Probability and Statistics", "1 hour and 30 mins", ["Monday", "Thursday"], ["CB 321", "CB 322", "CB 323", "CB 324", "CB 325", "CB 326", "CB 327"], ["Instructor A"], 30),
+        # Add more subjects as needed
+    ]
 
+    # Run the genetic algorithm and export the best schedule
+    best_schedule = genetic_algorithm(subjects)
+    export_to_excel(best_schedule)
@@ -1,6 +1,22 @@
 import random
-from openpyxl import Workbook
-from openpyxl.styles import Alignment
+import sys
+
+import ga_problem
+from ga_checkpoint import Checkpoint
+from ga_decompose import solve_components
+from ga_engine import StoppingCriteria, evolve
+from ga_export import export_schedule
+from ga_loader import load_catalog
+from ga_occupancy import ScoreIndex
+from ga_parallel import PoolEvaluator, run_islands
+from ga_problem import ProblemInstance
+from ga_repair import Repair
+from ga_telemetry import Callbacks, JsonlWriter, profiled
+from ga_warm_start import warm_problem
+
+# Default stall window of warm-started runs: when some genes must move, the churn they
+# cost keeps the score above zero, so the target alone may never end the run
+WARM_STALL_GENERATIONS = 100
 
 
 # Define the Department class to hold courses
@@ -39,196 +55,191 @@ class Subject:
 
 # Define the Schedule class for managing and optimizing schedules
 class Schedule:
-    def __init__(self, subjects, sections):
+    def __init__(self, subjects, sections, problem=None):
         self.subjects = subjects
         self.sections = sections
-        self.schedule = {}  # To hold the subject schedules
+        # Compiled id tables shared by the whole population
+        self.problem = problem if problem is not None else ProblemInstance(subjects, sections)
+        self.genes = None  # One packed (start slot, room) integer per (section, subject, day)
+        self.occupancy = None  # Built on the first fitness call, then updated move by move
+        self.conflicts = None  # Cached conflict count; None when the genes changed since scoring
 
     # Initialize a random schedule for subjects
     def initialize(self):
-        for section in self.sections:
-            for subject in self.subjects:
-                available_times = self.generate_time_slots(subject.duration)
-                available_rooms = subject.rooms
-                available_instructor_times = subject.instructor_avail
+        # Each section/subject gets a time that fits the instructor and one room for all its days
+        self.genes = self.problem.initialize(random)
+        self.occupancy = None
+        self.conflicts = None
 
-                # Randomly choose a time and room that fit both instructor and subject constraints
-                time_slot = random.choice(list(set(available_times) & set(available_instructor_times)))
-                room = random.choice(available_rooms)
+    # Decoded {(section, subject_code, day): (start_time, room)} view, only used for export
+    @property
+    def schedule(self):
+        return self.problem.decode(self.genes)
 
-                # Schedule the subject for each of its available days
-                for day in subject.available_days:
-                    self.schedule[(section.section_name, subject.code, day)] = (time_slot, room)
-
-    # Generate possible time slots based on the duration of the subject
+    # Possible start time slots for the duration, from the precomputed tables
     def generate_time_slots(self, duration):
-        start_time = 7 * 60  # Start at 7:00 AM in minutes
-        end_time = 21 * 60  # End at 9:00 PM in minutes
-        slots = []
-
-        # Convert duration to minutes
-        if duration == "1 hour and 30 mins":
-            slot_duration = 90
-        elif duration == "3 hours":
-            slot_duration = 180
-        elif duration == "5 hours":
-            slot_duration = 300
-        else:
-            raise ValueError("Invalid duration")
-
-        # Create time slots every 30 minutes
-        current_time = start_time
-        while current_time + slot_duration <= end_time:
-            hour = current_time // 60
-            minute = current_time % 60
-            slots.append(f"{hour:02d}:{minute:02d}")
-            current_time += 30
-
-        return slots
+        return self.problem.start_times(duration)
 
     # Calculate the fitness based on the number of conflicts
     def calculate_fitness(self):
-        conflicts = 0
-        schedule_slots = {}
+        if self.conflicts is None:
+            self.occupancy = ScoreIndex(self.problem, self.genes)
+            self.conflicts = self.occupancy.conflicts
+        return 1 / (1 + self.conflicts)
 
-        # Check for conflicts in the schedule
-        for (section, subject_code, day), (start_time, room) in self.schedule.items():
-            subject = next(sub for sub in self.subjects if sub.code == subject_code)
-            occupied_slots = self.get_occupied_slots(start_time, subject.duration)
-
-            for slot in occupied_slots:
-                key = (slot, day, room)
-                if key in schedule_slots:
-                    conflicts += 1
-                schedule_slots[key] = (section, subject_code)
-
-        return 1 / (1 + conflicts)
-
-    # Get time slots occupied by a subject
+    # Get time slots occupied by a subject, from the precomputed tables
     def get_occupied_slots(self, start_time, duration):
-        time_slots = []
-        hour, minute = map(int, start_time.split(':'))
-        total_minutes = hour * 60 + minute
-
-        if duration == "1 hour and 30 mins":
-            duration_minutes = 90
-        elif duration == "3 hours":
-            duration_minutes = 180
-        elif duration == "5 hours":
-            duration_minutes = 300
-        else:
-            raise ValueError("Invalid duration")
+        return self.problem.occupied_times(start_time, duration)
 
-        while duration_minutes > 0:
-            hour = total_minutes // 60
-            minute = total_minutes % 60
-            time_slots.append(f"{hour:02d}:{minute:02d}")
-            total_minutes += 30
-            duration_minutes -= 30
-
-        return time_slots
+    # Place one gene at a new packed (start slot, room) value, keeping the conflict count current
+    def move(self, gene, value):
+        if self.occupancy is not None:
+            self.occupancy.move(gene, self.genes[gene], value)
+            self.conflicts = self.occupancy.conflicts
+        else:
+            self.conflicts = None
+        self.genes[gene] = value
 
     # Randomly mutate a schedule by changing time or room
     def mutate(self):
-        section, subject_code, day = random.choice(list(self.schedule.keys()))
-        subject = next((s for s in self.subjects if s.code == subject_code), None)
-        available_times = self.generate_time_slots(subject.duration)
-        available_rooms = subject.rooms
-
-        new_time_slot = random.choice(available_times)
-        new_room = random.choice(available_rooms)
-
-        self.schedule[(section, subject_code, day)] = (new_time_slot, new_room)
+        gene, value = self.problem.random_move(random)
+        self.move(gene, value)
 
 
 # Crossover operation to generate new offspring from parents
 def crossover(parent1, parent2):
-    crossover_point = random.randint(0, len(parent1.schedule) - 1)
-    child1 = Schedule(parent1.subjects, parent1.sections)
-    child2 = Schedule(parent2.subjects, parent2.sections)
-
-    for i, key in enumerate(parent1.schedule.keys()):
-        if i < crossover_point:
-            child1.schedule[key] = parent1.schedule[key]
-            child2.schedule[key] = parent2.schedule[key]
-        else:
-            child1.schedule[key] = parent2.schedule[key]
-            child2.schedule[key] = parent1.schedule[key]
+    child1 = Schedule(parent1.subjects, parent1.sections, parent1.problem)
+    child2 = Schedule(parent2.subjects, parent2.sections, parent2.problem)
+    child1.genes, child2.genes = ga_problem.crossover(parent1.genes, parent2.genes, random)
 
     return child1, child2
 
 
-# Genetic Algorithm implementation to find the best schedule
-def genetic_algorithm(subjects, sections, population_size=100, generations=1000):
-    population = [Schedule(subjects, sections) for _ in range(population_size)]
-
-    # Initialize the population
-    for schedule in population:
-        schedule.initialize()
-
-    # Run the genetic algorithm over generations
-    for generation in range(generations):
-        population = sorted(population, key=lambda x: x.calculate_fitness(), reverse=True)
-        next_generation = population[:population_size // 2]
-
-        while len(next_generation) < population_size:
-            parent1 = random.choice(population[:population_size // 2])
-            parent2 = random.choice(population[:population_size // 2])
-            child1, child2 = crossover(parent1, parent2)
-
-            if random.random() < 0.1:
-                child1.mutate()
-                child2.mutate()
-
-            next_generation.extend([child1, child2])
-
-        population = next_generation
-
-    return max(population, key=lambda x: x.calculate_fitness())
-
-
-# Export the schedule to an Excel file with merged cells
-def export_to_excel(schedule, filename="schedule.xlsx"):
-    time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Class Schedule"
-
-    # Create headers
-    ws.append(["Time"] + days)
-
-    for i, time_slot in enumerate(time_slots, start=2):
-        ws[f"A{i}"] = time_slot
-
-    # Fill in the schedule
-    for (section, subject_code, day), (start_time, room) in schedule.schedule.items():
-        subject = next((s for s in schedule.subjects if s.code == subject_code), None)
-        start_row = time_slots.index(start_time) + 2
-        occupied_slots = schedule.get_occupied_slots(start_time, subject.duration)
-        end_row = start_row + len(occupied_slots) - 1
-        col = days.index(day) + 2
-        cell_value = f"{section} - {subject_code} ({room})"
-
-        # Merge cells according to the duration of the subject
-        ws.merge_cells(start_row=start_row, start_column=col, end_row=end_row, end_column=col)
-        top_left_cell = ws.cell(row=start_row, column=col)
-        top_left_cell.value = cell_value
-        top_left_cell.alignment = Alignment(horizontal='center', vertical='center')
-
-    wb.save(filename)
+# Genetic Algorithm implementation to find the best schedule.
+# Pass a FitnessCache to share it between runs of the same problem (it raises ValueError
+# when given another one) or to read its hit/miss counters afterwards.
+# workers=N scores each generation on N processes; with a fixed seed the result is the
+# same as a serial run.
+# islands=K runs K populations in separate processes that swap their best `migrants`
+# schedules along `topology` ("ring", "complete" or a callable) every `migration_interval`
+# generations.
+# The run stops early once the best fitness reaches target_fitness, after stall_generations
+# without improvement, after time_budget seconds or when population diversity drops below
+# min_diversity (see ga_engine.StoppingCriteria). best.result.stop_reason tells which fired.
+# on_generation receives a per-generation stats record (see ga_telemetry.generation_record);
+# telemetry streams the same records to a JSONL file and profile dumps cProfile stats to a file.
+# selection picks parents: "truncation" (uniform from the best half, the default),
+# "tournament", "roulette", "sus", "rank" or a strategy object (see ga_selection).
+# operators=ga_operators.BatchOperators(...) breeds each generation with batched uniform,
+# k-point or section-block crossover and per-gene mutation rates.
+# repair=True builds the initial population with the conflict-light initializer and moves
+# every child's clashing genes to the nearest free slot (see ga_repair.Repair).
+# conflict_types picks which double-bookings are counted: any of "room", "instructor"
+# and "section". weights ({term: int}, see ga_problem.TERMS) adds or reweights hard and
+# soft terms; room_capacity ({room: seats}) enables the capacity term.
+# best.result.terms breaks the best schedule's score down per term.
+# local_search ("steepest", "tabu", "annealing" or a ga_local_search.LocalSearch with its
+# move budget) periodically improves the best schedules with single-gene moves.
+# checkpoint (a path, snapshotted every minute, or a ga_checkpoint.Checkpoint) saves the
+# run periodically; resume_from=path continues a saved run with the same arguments.
+# Neither works with islands.
+# decompose=True splits the problem into groups of subjects that share no counted resource
+# and evolves each group as its own GA on `workers` processes (see ga_decompose); the
+# run-wide options islands, checkpoints, on_generation and telemetry don't apply to it.
+# warm_start (an exported schedule .xlsx/.csv, a saved .npy chromosome or a chromosome
+# array) re-schedules from a previous timetable: genes that are still valid and clash-free
+# stay pinned, the rest are searched, and every gene moved from its old placement costs
+# churn_weight. release_instructors also frees all genes of those instructors, and
+# warm_neighbors the genes sharing a room, instructor or section day with a freed one
+# (see ga_warm_start). Churn is reported apart from conflicts (best.result.churn) and the
+# target_fitness rule ignores it; warm runs also stop after WARM_STALL_GENERATIONS without
+# improvement unless stall_generations is given.
+def genetic_algorithm(subjects, sections, population_size=100, generations=1000, cache=None, workers=None,
+                      seed=None, islands=None, migration_interval=10, migrants=2, topology="ring",
+                      target_fitness=1.0, stall_generations=None, time_budget=None, min_diversity=None,
+                      on_generation=None, telemetry=None, profile=None, selection="truncation",
+                      operators=None, repair=False, conflict_types=("room",), weights=None,
+                      room_capacity=None, local_search=None, checkpoint=None, resume_from=None,
+                      decompose=False, warm_start=None, churn_weight=1, release_instructors=(),
+                      warm_neighbors=False):
+    problem = ProblemInstance(subjects, sections, conflict_types, weights, room_capacity)
+    if warm_start is not None:
+        if decompose:
+            raise ValueError("Decomposed runs cannot be warm-started")
+        problem = warm_problem(problem, warm_start, churn_weight, release_instructors, warm_neighbors)
+        if stall_generations is None:
+            stall_generations = WARM_STALL_GENERATIONS
+    stopping = StoppingCriteria(target_fitness, stall_generations, time_budget, min_diversity)
+    fixer = Repair(problem) if repair else None
+    if isinstance(checkpoint, str):
+        checkpoint = Checkpoint(checkpoint)
+    options = {"selection": selection, "operators": operators, "repair": fixer,
+               "initializer": fixer.initialize if fixer is not None and warm_start is None else None,
+               "local_search": local_search}
+    with profiled(profile):
+        if decompose:
+            if (islands is not None and islands > 1) or checkpoint is not None or resume_from is not None:
+                raise ValueError("Decomposed runs cannot use islands or checkpoints")
+            if on_generation is not None or telemetry is not None:
+                raise ValueError("Decomposed runs don't report per-generation records")
+            result = solve_components(problem, population_size, generations, workers, seed, stopping, selection,
+                                      operators, repair, local_search)
+        elif islands is not None and islands > 1:
+            if on_generation is not None:
+                raise ValueError("on_generation cannot run inside island processes; use telemetry= instead")
+            if checkpoint is not None or resume_from is not None:
+                raise ValueError("Island runs cannot be checkpointed")
+            result = run_islands(problem, islands, population_size, generations, migration_interval, migrants,
+                                 topology, seed, stopping, telemetry, **options)
+        else:
+            if seed is not None:
+                random.seed(seed)
+            writer = JsonlWriter(telemetry) if telemetry is not None else None
+            # No callback at all unless someone listens: evolve() skips building the records
+            callback = Callbacks(on_generation, writer) if on_generation is not None or writer is not None else None
+            try:
+                if workers is not None and workers > 1:
+                    with PoolEvaluator(problem, workers) as evaluator:
+                        result = evolve(problem, population_size, generations, random, cache, evaluator,
+                                        stopping=stopping, on_generation=callback, checkpoint=checkpoint,
+                                        resume_from=resume_from, **options)
+                else:
+                    result = evolve(problem, population_size, generations, random, cache, stopping=stopping,
+                                    on_generation=callback, checkpoint=checkpoint, resume_from=resume_from,
+                                    **options)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    best = Schedule(subjects, sections, problem)
+    best.genes = result.genes
+    best.conflicts = result.conflicts
+    best.result = result
+    return best
+
+
+# Export the schedule to an Excel file with one sheet per section, room and instructor
+# (see ga_export.export_schedule); csv_path / parquet_path also write a flat table
+def export_to_excel(schedule, filename="schedule.xlsx", csv_path=None, parquet_path=None):
+    export_schedule(schedule.problem, schedule.genes, filename, csv_path=csv_path, parquet_path=parquet_path)
     print(f"Schedule saved to {filename}")
 
 
-# Example usage
-subjects = [
-    Subject("CS101", "Intro to Programming", "1 hour and 30 mins", ["Monday", "Thursday"], ["Room 1", "Room 2"], "Prof. A", ["08:00", "10:00"], 30),
-    Subject("CS102", "Data Structures", "3 hours", ["Tuesday", "Friday"], ["Room 1", "Room 3"], "Prof. B", ["09:00", "13:00"], 25),
-    Subject("CS103", "Algorithms", "5 hours", ["Wednesday"], ["Room 2", "Room 4"], "Prof. C", ["11:00"], 20),
-]
+if __name__ == "__main__":
+    # Example usage: python ga3.2.py [catalog.xlsx | subjects.csv [sections.csv [rooms.csv]]]
+    # reads the problem from spreadsheets (see ga_loader), else uses the subjects below
+    subjects = [
+        Subject("CS101", "Intro to Programming", "1 hour and 30 mins", ["Monday", "Thursday"], ["Room 1", "Room 2"], "Prof. A", ["08:00", "10:00"], 30),
+        Subject("CS102", "Data Structures", "3 hours", ["Tuesday", "Friday"], ["Room 1", "Room 3"], "Prof. B", ["09:00", "13:00"], 25),
+        Subject("CS103", "Algorithms", "5 hours", ["Wednesday"], ["Room 2", "Room 4"], "Prof. C", ["11:00"], 20),
+    ]
+
+    sections = [Section("CS11"), Section("CS12"), Section("CS13")]
+    room_capacity = None
 
-sections = [Section("CS11"), Section("CS12"), Section("CS13")]
+    if len(sys.argv) > 1:
+        catalog = load_catalog(*sys.argv[1:4])
+        subjects, sections, room_capacity = catalog.subjects, catalog.sections, catalog.room_capacity
 
-best_schedule = genetic_algorithm(subjects, sections)
-export_to_excel(best_schedule)
+    best_schedule = genetic_algorithm(subjects, sections, room_capacity=room_capacity)
+    export_to_excel(best_schedule)
@@ -1,5 +1,9 @@
 import random
-import pandas as pd
+import numpy as np
+
+from ga_fitness import FitnessCache
+from ga_parallel import PoolEvaluator
+from ga_problem import ProblemInstance
 
 
 # Define the class structure for subjects
@@ -16,8 +20,10 @@ class Subject:
 
 # Schedule class that manages the entire scheduling process
 class Schedule:
-    def __init__(self, subjects):
+    def __init__(self, subjects, problem=None):
         self.subjects = subjects
+        # Compiled lookup tables (subject index, start times, occupied slots) shared by the population
+        self.problem = problem if problem is not None else ProblemInstance(subjects)
         self.schedule = {}
 
     # Initializes the schedule with random room and time slots
@@ -32,32 +38,9 @@ class Schedule:
             for day in subject.days:
                 self.schedule[(subject.code, day)] = (time_slot, room)
 
-    # Generates time slots based on the subject duration
+    # Time slots a subject of this duration can start at, from the precomputed tables
     def generate_time_slots(self, duration):
-        start_time = 7 * 60  # 7:00 AM in minutes
-        end_time = 21 * 60  # 9:00 PM in minutes
-        intervals = []
-
-        # Duration in minutes
-        if duration == "1 hour and 30 mins":
-            slot_duration = 90
-        elif duration == "3 hours":
-            slot_duration = 180
-        elif duration == "5 hours":
-            slot_duration = 300
-        else:
-            raise ValueError("Invalid duration")
-
-        # Generate available time slots based on duration
-        current_time = start_time
-        while current_time + slot_duration <= end_time:
-            hour = current_time // 60
-            minute = current_time % 60
-            time_str = f"{hour:02d}:{minute:02d}"
-            intervals.append(time_str)
-            current_time += 30  # Increment in 30 min intervals
-
-        return intervals
+        return self.problem.start_times(duration)
 
     # Calculate the fitness score based on conflicts
     def calculate_fitness(self):
@@ -66,7 +49,7 @@ class Schedule:
 
         # Count conflicts in the schedule
         for (subject_code, day), (start_time, room) in self.schedule.items():
-            duration = next(sub.duration for sub in self.subjects if sub.code == subject_code)
+            duration = self.problem.subject(subject_code).duration
             time_slots = self.get_occupied_slots(start_time, duration)
 
             for slot in time_slots:
@@ -77,34 +60,14 @@ class Schedule:
 
         return 1 / (1 + conflicts)
 
-    # Returns a list of all time slots a subject occupies based on start time and duration
+    # Returns all time slots a subject occupies, from the precomputed tables
     def get_occupied_slots(self, start_time, duration):
-        time_slots = []
-        hour, minute = map(int, start_time.split(':'))
-        total_minutes = hour * 60 + minute
-
-        if duration == "1 hour and 30 mins":
-            duration_minutes = 90
-        elif duration == "3 hours":
-            duration_minutes = 180
-        elif duration == "5 hours":
-            duration_minutes = 300
-        else:
-            raise ValueError("Invalid duration")
-
-        while duration_minutes > 0:
-            hour = total_minutes // 60
-            minute = total_minutes % 60
-            time_slots.append(f"{hour:02d}:{minute:02d}")
-            total_minutes += 30
-            duration_minutes -= 30
-
-        return time_slots
+        return self.problem.occupied_times(start_time, duration)
 
     # Mutate the schedule to introduce genetic diversity
     def mutate(self):
         subject_code, day = random.choice(list(self.schedule.keys()))
-        subject = next((s for s in self.subjects if s.code == subject_code), None)
+        subject = self.problem.subject(subject_code)
         available_times = self.generate_time_slots(subject.duration)
         available_rooms = subject.room_avail
 
@@ -119,8 +82,8 @@ class Schedule:
 # Performs crossover between two parent schedules
 def crossover(parent1, parent2):
     crossover_point = random.randint(0, len(parent1.schedule) - 1)
-    child1 = Schedule(parent1.subjects)
-    child2 = Schedule(parent2.subjects)
+    child1 = Schedule(parent1.subjects, parent1.problem)
+    child2 = Schedule(parent2.subjects, parent2.problem)
 
     for i, key in enumerate(parent1.schedule.keys()):
         if i < crossover_point:
@@ -134,8 +97,20 @@ def crossover(parent1, parent2):
 
 
 # Main genetic algorithm function
-def genetic_algorithm(subjects, population_size=100, generations=1000):
-    population = [Schedule(subjects) for _ in range(population_size)]
+def genetic_algorithm(subjects, population_size=100, generations=1000, cache=None, workers=None, seed=None):
+    if seed is not None:
+        random.seed(seed)
+    problem = ProblemInstance(subjects)
+    if workers is not None and workers > 1:
+        with PoolEvaluator(problem, workers) as evaluator:
+            return evolve(subjects, problem, population_size, generations, cache, evaluator)
+    return evolve(subjects, problem, population_size, generations, cache)
+
+
+# Generation loop of genetic_algorithm; evaluator (e.g. a PoolEvaluator) scores new schedules
+def evolve(subjects, problem, population_size, generations, cache=None, evaluator=None):
+    cache = cache if cache is not None else FitnessCache()
+    population = [Schedule(subjects, problem) for _ in range(population_size)]
 
     # Initialize each schedule in the population
     for schedule in population:
@@ -143,7 +118,10 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
 
     # Run the algorithm for a set number of generations
     for generation in range(generations):
-        population = sorted(population, key=lambda x: x.calculate_fitness(), reverse=True)
+        # Score the whole population in one batched pass, reusing cached scores of
+        # schedules seen before; fewest conflicts first
+        conflicts = cache.evaluate(problem, np.stack([problem.encode(x.schedule) for x in population]), evaluator)
+        population = [population[i] for i in np.argsort(conflicts, kind='stable')]
         next_generation = population[:population_size // 2]
 
         # Generate new offspring
@@ -161,17 +139,20 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
         population = next_generation
 
     # Return the best schedule
-    return max(population, key=lambda x: x.calculate_fitness())
+    conflicts = cache.evaluate(problem, np.stack([problem.encode(x.schedule) for x in population]), evaluator)
+    return population[int(np.argmin(conflicts))]
 
 
 # Exports the schedule to an Excel file
 def export_to_excel(schedule, filename="schedule.xlsx"):
+    import pandas as pd  # Only needed to export
+
     time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     df = pd.DataFrame(index=time_slots, columns=days)
 
     for (subject_code, day), (start_time, room) in schedule.schedule.items():
-        subject = next((s for s in schedule.subjects if s.code == subject_code), None)
+        subject = schedule.problem.subject(subject_code)
         occupied_slots = schedule.get_occupied_slots(start_time, subject.duration)
 
         for slot in occupied_slots:
@@ -181,15 +162,16 @@ def export_to_excel(schedule, filename="schedule.xlsx"):
     print(f"Schedule saved to {filename}")
 
 
-# Example usage with sample subjects
-subjects = [
-    Subject("CS101", "Intro to CS", "1 hour and 30 mins", ["Monday", "Thursday"], ["Room 101", "Room 102"],
-            ["Instructor A"], 30),
-    Subject("CS102", "Data Structures", "3 hours", ["Tuesday", "Friday"], ["Room 103", "Room 104"], ["Instructor B"],
-            25),
-    Subject("CS103", "Algorithms", "5 hours", ["Wednesday"], ["Room 105"], ["Instructor C"], 20),
-    # Add more subjects as needed
-]
+if __name__ == "__main__":
+    # Example usage with sample subjects
+    subjects = [
+        Subject("CS101", "Intro to CS", "1 hour and 30 mins", ["Monday", "Thursday"], ["Room 101", "Room 102"],
+                ["Instructor A"], 30),
+        Subject("CS102", "Data Structures", "3 hours", ["Tuesday", "Friday"], ["Room 103", "Room 104"], ["Instructor B"],
+                25),
+        Subject("CS103", "Algorithms", "5 hours", ["Wednesday"], ["Room 105"], ["Instructor C"], 20),
+        # Add more subjects as needed
+    ]
 
-best_schedule = genetic_algorithm(subjects)
-export_to_excel(best_schedule)
+    best_schedule = genetic_algorithm(subjects)
+    export_to_excel(best_schedule)
@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ga_engine import StoppingCriteria, evolve
+from ga_export import export_schedule
+from ga_loader import load_catalog
+from ga_local_search import LocalSearch, make_local_search
+from ga_operators import CROSSOVERS, BatchOperators
+from ga_problem import RESOURCES, TERMS
+from ga_repair import Repair
+from ga_selection import SELECTIONS
+
+
+# Settings a job may give; missing ones come from the batch defaults, then from here
+JOB_DEFAULTS = {
+    "sections": None,
+    "rooms": None,
+    "population_size": 100,
+    "generations": 1000,
+    "seed": None,
+    "selection": "truncation",
+    "crossover": None,  # A ga_operators.CROSSOVERS name to breed with BatchOperators
+    "repair": False,
+    "local_search": None,
+    "conflict_types": ["room"],
+    "weights": None,
+    "target_fitness": 1.0,
+    "stall_generations": None,
+    "time_budget": None,
+}
+
+
+# Check the GA settings of a job (see JOB_DEFAULTS) before it runs: raises ValueError
+# naming the first setting of the wrong type or with an unknown value
+def check_settings(job):
+    def number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def integer(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    checks = {
+        "population_size": lambda value: integer(value) and value >= 2,
+        "generations": lambda value: integer(value) and value >= 0,
+        "seed": lambda value: value is None or integer(value),
+        "selection": lambda value: isinstance(value, str) and value in SELECTIONS,
+        "crossover": lambda value: value is None or isinstance(value, str) and value in CROSSOVERS,
+        "repair": lambda value: isinstance(value, bool),
+        "local_search": lambda value: value is None or isinstance(value, str) and value in LocalSearch.METHODS,
+        "conflict_types": lambda value: isinstance(value, list) and all(isinstance(resource, str) and
+                                                                         resource in RESOURCES for resource in value),
+        "weights": lambda value: value is None or isinstance(value, dict) and all(
+            term in TERMS and integer(weight) for term, weight in value.items()),
+        "target_fitness": lambda value: value is None or number(value),
+        "stall_generations": lambda value: value is None or integer(value) and value >= 1,
+        "time_budget": lambda value: value is None or number(value) and value > 0,
+    }
+    for setting, check in checks.items():
+        if not check(job[setting]):
+            raise ValueError(f"Invalid {setting}: {job[setting]!r}")
+
+
+# A job's name becomes its output file names, so it must be a plain file name: no directory
+# part that would put them outside the output directory
+def check_name(name):
+    if not isinstance(name, str) or name in ("", ".", "..") or os.path.basename(name) != name:
+        raise ValueError(f"Invalid job name: {name!r}")
+
+
+# Input files a directory job is made of
+CATALOG_FILES = ("subjects", "sections", "rooms")
+
+
+# A job reads its catalog from a "subjects" path, with optional "sections" and "rooms"
+# paths: raises ValueError when one is missing or not a string
+def check_files(job):
+    if not isinstance(job.get("subjects"), str):
+        raise ValueError("A job needs a subjects path")
+    for key in CATALOG_FILES[1:]:
+        if job.get(key) is not None and not isinstance(job[key], str):
+            raise ValueError(f"Invalid {key} path: {job[key]!r}")
+
+
+# Jobs listed in a manifest: a JSON list of job objects, or one JSON object per line.
+# Every job has a "subjects" path (and optionally "sections", "rooms" and any JOB_DEFAULTS
+# setting); relative paths are relative to the manifest. "name" defaults to the subjects
+# file name, or to the entry's position when it has none. Entries are returned as they are
+# otherwise: run_batch records the ones that aren't valid jobs as failed.
+def read_manifest(path):
+    with open(path) as handle:
+        text = handle.read()
+    stripped = text.lstrip()
+    jobs = json.loads(text) if stripped.startswith("[") else [json.loads(line) for line in text.splitlines()
+                                                             if line.strip()]
+    base = os.path.dirname(os.path.abspath(path))
+    for number, job in enumerate(jobs, 1):
+        if not isinstance(job, dict):
+            continue
+        for key in CATALOG_FILES:
+            if isinstance(job.get(key), str):
+                job[key] = os.path.join(base, job[key])
+        if "name" not in job:
+            subjects = job.get("subjects")
+            job["name"] = (os.path.splitext(os.path.basename(subjects))[0] if isinstance(subjects, str)
+                           else f"entry {number}")
+    return jobs
+
+
+# One job per workbook (.xlsx) in a directory and per subdirectory holding subjects.csv
+# (with sections.csv and rooms.csv when present)
+def discover_jobs(directory):
+    jobs = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if entry.lower().endswith(".xlsx") and not entry.startswith("~$"):
+            jobs.append({"name": os.path.splitext(entry)[0], "subjects": path})
+        elif os.path.isfile(os.path.join(path, "subjects.csv")):
+            job = {"name": entry}
+            for key in CATALOG_FILES:
+                if os.path.isfile(os.path.join(path, f"{key}.csv")):
+                    job[key] = os.path.join(path, f"{key}.csv")
+            jobs.append(job)
+    return jobs
+
+
+# Jobs from a manifest file or a directory
+def load_jobs(source):
+    return discover_jobs(source) if os.path.isdir(source) else read_manifest(source)
+
+
+# Estimated cost of a job: genes x population x generations. Catalogs come from the
+# ga_loader cache, so this costs a stat and an unpickle per job.
+def job_work(job):
+    catalog = load_catalog(job["subjects"], job["sections"], job["rooms"])
+    days = sum(len(subject.available_days) for subject in catalog.subjects)
+    genes = days * (len(catalog.sections) if catalog.sections is not None else 1)
+    return genes * job["population_size"] * job["generations"]
+
+
+# Compiled problems of this worker process by catalog and scoring settings, so jobs
+# re-solving the same catalog (other seeds or budgets) skip the compile step
+_worker_problems = {}
+
+
+# Problem of a job with its scoring settings: catalog_key identifies the catalog (its files,
+# or a hash of posted data) and load() returns the Catalog, called only when not compiled yet
+def worker_problem(job, catalog_key, load):
+    key = (catalog_key, tuple(job["conflict_types"]), json.dumps(job["weights"], sort_keys=True))
+    if key not in _worker_problems:
+        _worker_problems[key] = load().problem(conflict_types=tuple(job["conflict_types"]), weights=job["weights"])
+    return _worker_problems[key]
+
+
+# Run evolve() on a problem with a job's GA settings (see JOB_DEFAULTS)
+def solve_job(problem, job, on_generation=None):
+    fixer = Repair(problem) if job["repair"] else None
+    stopping = StoppingCriteria(job["target_fitness"], job["stall_generations"], job["time_budget"])
+    operators = BatchOperators(job["crossover"]) if job["crossover"] is not None else None
+    return evolve(problem, job["population_size"], job["generations"], random.Random(job["seed"]),
+                  stopping=stopping, on_generation=on_generation, selection=job["selection"], operators=operators,
+                  initializer=fixer.initialize if fixer is not None else None, repair=fixer,
+                  local_search=make_local_search(job["local_search"]))
+
+
+# Solve one job and write its schedule to output_dir as <name>.xlsx and <name>.csv;
+# returns its summary record
+def run_job(job, output_dir):
+    started = time.perf_counter()
+    files = (job["subjects"], job["sections"], job["rooms"])
+    problem = worker_problem(job, files, lambda: load_catalog(*files))
+    result = solve_job(problem, job)
+    workbook = os.path.join(output_dir, f"{job['name']}.xlsx")
+    export_schedule(problem, result.genes, workbook, csv_path=os.path.join(output_dir, f"{job['name']}.csv"))
+    return {"name": job["name"], "genes": problem.n_genes, "conflicts": result.conflicts,
+            "terms": result.terms, "generations": result.generations, "stop_reason": result.stop_reason,
+            "elapsed": time.perf_counter() - started, "worker": os.getpid(), "output": workbook}
+
+
+# Summary record of a job that failed to load or to run
+def failure(job, error):
+    return {"name": job["name"], "error": f"{type(error).__name__}: {error}"}
+
+
+# Solve every job of a manifest or directory on one process pool of `workers` processes
+# (all cores by default). The pool lives for the whole batch, so imports and compiled
+# problems stay warm across jobs. Jobs are started longest first (see job_work) so the
+# big ones don't end up running alone at the end. Each result is exported as soon as its
+# job finishes and its summary appended to output_dir/summary.jsonl; on_result receives
+# every summary too. A manifest entry that isn't a job object, a job whose catalog can't
+# be loaded, or whose run fails, is recorded with its error and the others go on.
+# defaults overrides JOB_DEFAULTS for every job. Returns the summaries in finishing order.
+def run_batch(source, output_dir, workers=None, defaults=None, on_result=None):
+    entries = load_jobs(source)
+    jobs = [{**JOB_DEFAULTS, **(defaults or {}), **job} for job in entries if isinstance(job, dict)]
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names must be unique: they name the output files")
+    os.makedirs(output_dir, exist_ok=True)
+    summaries = []
+    with open(os.path.join(output_dir, "summary.jsonl"), "a") as out:
+        def record(summary):
+            out.write(json.dumps(summary) + "\n")
+            out.flush()
+            summaries.append(summary)
+            if on_result is not None:
+                on_result(summary)
+
+        # Entries that aren't job objects, bad names, paths or settings, or a catalog that
+        # can't be read, fail their job here; the others are still scheduled
+        for number, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict):
+                record(failure({"name": f"entry {number}"}, ValueError(f"A job must be a JSON object, not {entry!r}")))
+        work = {}
+        for job in jobs:
+            try:
+                check_name(job["name"])
+                check_files(job)
+                check_settings(job)
+                work[job["name"]] = job_work(job)
+            except Exception as error:
+                record(failure(job, error))
+        jobs = sorted((job for job in jobs if job["name"] in work), key=lambda job: work[job["name"]], reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(run_job, job, output_dir): job for job in jobs}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    try:
+                        record(future.result())
+                    except Exception as error:
+                        record(failure(job, error))
+    return summaries
+
+
+def _print_summary(summary):
+    if "error" in summary:
+        print(f"{summary['name']:>20} failed: {summary['error']}")
+    else:
+        print(f"{summary['name']:>20} genes={summary['genes']:<6} conflicts={summary['conflicts']:<5} "
+              f"{summary['elapsed']:7.1f}s  {summary['output']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve many timetables on one process pool")
+    parser.add_argument("source", help="manifest (JSON list or JSON lines) or directory of catalogs")
+    parser.add_argument("--output", default="schedules")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--population", type=int, default=JOB_DEFAULTS["population_size"])
+    parser.add_argument("--generations", type=int, default=JOB_DEFAULTS["generations"])
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stall-generations", type=int, default=None)
+    parser.add_argument("--time-budget", type=float, default=None)
+    args = parser.parse_args()
+    run_batch(args.source, args.output, args.workers,
+              {"population_size": args.population, "generations": args.generations, "seed": args.seed,
+               "stall_generations": args.stall_generations, "time_budget": args.time_budget},
+              on_result=_print_summary)
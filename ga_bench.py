@@ -0,0 +1,209 @@
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from ga_fitness import FitnessCache
+from ga_problem import DAYS, DURATION_MINUTES, SLOT_INDEX, SLOTS_PER_DAY, TIME_SLOTS, duration_slots
+
+try:
+    import resource  # Peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Benchmarked scripts and the Subject model each one expects:
+# "times" - Subject(code, name, time_slots, days, room_avail, instructor_avail, num_students)
+# "durations" - Subject(code, name, duration, days, room_avail, instructor_avail, num_students)
+# "sections" - ga3.2's Subject/Section classes
+ENGINES = {
+    "ga2": ("ga2.py", "times"),
+    "ga_test1": ("ga_test1.py", "times"),
+    "genetic_algo": ("genetic_algo.py", "times"),
+    "ga3": ("ga3.py", "durations"),
+    "ga3.1": ("ga3.1.py", "durations"),
+    "ga3.2": ("ga3.2.py", "sections"),
+}
+
+# ga2/ga_test1 compare every pair of genes, so very large instances are skipped for them
+MAX_GENES = {"ga2": 500, "ga_test1": 500}
+
+DEFAULT_SIZES = [10, 50, 100, 250, 500, 1000, 2000]
+
+
+# Seeded synthetic catalog: subjects with random durations, meeting days, candidate rooms
+# from a shared pool (more of them when more sections take the subject), an instructor and
+# a few available start times, taken by every section.
+def generate_instance(n_subjects, n_sections, n_rooms, n_days=len(DAYS), seed=0):
+    rng = random.Random(seed)
+    rooms = [f"Room {i + 1}" for i in range(n_rooms)]
+    instructors = [f"Instructor {i + 1}" for i in range(max(1, n_subjects // 2))]
+    days = DAYS[:n_days]
+    subjects = []
+    for i in range(n_subjects):
+        duration = rng.choice(list(DURATION_MINUTES))
+        meetings = 1 if duration == "5 hours" else min(2, len(days))
+        starts = TIME_SLOTS[:SLOTS_PER_DAY - duration_slots(duration) + 1]
+        subjects.append({
+            "code": f"S{i + 1:03d}",
+            "name": f"Subject {i + 1}",
+            "duration": duration,
+            "days": sorted(rng.sample(days, meetings), key=DAYS.index),
+            "rooms": rng.sample(rooms, min(len(rooms), rng.randint(1, 3) + n_sections // 3)),
+            "instructor": rng.choice(instructors),
+            "instructor_avail": sorted(rng.sample(starts, min(len(starts), rng.randint(2, 6))), key=SLOT_INDEX.get),
+            "num_students": rng.randint(15, 45),
+        })
+    sections = [f"SEC{j + 1:03d}" for j in range(n_sections)]
+    return {"subjects": subjects, "sections": sections, "seed": seed}
+
+
+# Instance with roughly `genes` (section, subject, day) genes; rooms grow with the catalog
+# so larger instances stay about as constrained as small ones
+def instance_for_genes(genes, seed=0):
+    n_subjects = max(1, min(20, genes // 3))
+    n_sections = max(1, round(genes / (n_subjects * 1.7)))
+    n_rooms = max(2, math.ceil(n_subjects * n_sections / 12))
+    return generate_instance(n_subjects, n_sections, n_rooms, seed=seed)
+
+
+def instance_genes(instance):
+    return len(instance["sections"]) * sum(len(subject["days"]) for subject in instance["subjects"])
+
+
+# Import a script as a module (the example run sits behind its __main__ guard)
+def load_engine(engine):
+    filename, _ = ENGINES[engine]
+    spec = importlib.util.spec_from_file_location(engine.replace(".", "_"), os.path.join(REPO_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Builds the engine's own Subject (and Section) objects for an instance. Engines without
+# sections get one subject per (section, subject) pair so gene counts stay comparable.
+def build_inputs(module, model, instance):
+    if model == "sections":
+        subjects = [module.Subject(s["code"], s["name"], s["duration"], s["days"], s["rooms"], s["instructor"],
+                                   s["instructor_avail"], s["num_students"]) for s in instance["subjects"]]
+        return subjects, [module.Section(name) for name in instance["sections"]]
+    subjects = []
+    for section in instance["sections"]:
+        for s in instance["subjects"]:
+            times_or_duration = s["instructor_avail"] if model == "times" else s["duration"]
+            subjects.append(module.Subject(f"{s['code']}-{section}", s["name"], times_or_duration, s["days"],
+                                           s["rooms"], [s["instructor"]], s["num_students"]))
+    return subjects, None
+
+
+# FitnessCache that records (seconds, best conflicts) every time a generation is scored
+class CurveCache(FitnessCache):
+    def __init__(self, curve, started):
+        super().__init__()
+        self.curve = curve
+        self.started = started
+
+    def evaluate(self, problem, population, evaluator=None):
+        conflicts = super().evaluate(problem, population, evaluator)
+        self.curve.append((time.perf_counter() - self.started, int(conflicts.min())))
+        return conflicts
+
+
+# One benchmark run; executed in a fresh process so peak RSS belongs to this run only
+def run_engine(engine, instance, population_size, generations, seed):
+    module = load_engine(engine)
+    model = ENGINES[engine][1]
+    subjects, sections = build_inputs(module, model, instance)
+    curve = []
+    random.seed(seed)
+    started = time.perf_counter()
+    if model == "sections":
+        records = []
+        best = module.genetic_algorithm(subjects, sections, population_size, generations, seed=seed,
+                                        target_fitness=None, on_generation=records.append)
+        elapsed = time.perf_counter() - started
+        curve = [(record["elapsed"], record["best_conflicts"]) for record in records]
+        generations_run = best.result.generations
+        evaluations = sum(record["evaluations"] for record in records)
+        conflicts = best.conflicts
+    elif model == "durations":
+        cache = CurveCache(curve, started)
+        best = module.genetic_algorithm(subjects, population_size, generations, cache=cache, seed=seed)
+        elapsed = time.perf_counter() - started
+        generations_run = generations
+        evaluations = cache.misses
+        conflicts = round(1 / best.calculate_fitness() - 1)
+    else:
+        best = module.genetic_algorithm(subjects, population_size, generations)
+        elapsed = time.perf_counter() - started
+        generations_run = generations
+        evaluations = population_size * (generations + 1)  # sorted() key plus the final max()
+        conflicts = round(1 / best.calculate_fitness() - 1)
+        curve = [(elapsed, conflicts)]
+
+    return {
+        "engine": engine,
+        "elapsed": elapsed,
+        "generations": generations_run,
+        "generations_per_sec": generations_run / elapsed if elapsed else None,
+        "evaluations": evaluations,
+        "evaluations_per_sec": evaluations / elapsed if elapsed else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None,
+        "best_conflicts": conflicts,
+        "curve": curve,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Runs every engine on every instance size and appends one JSON line per run to output,
+# so results from successive versions accumulate in one file
+def run_benchmarks(engines, sizes, population_size=100, generations=100, seed=0, output="bench_results.jsonl"):
+    header = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+              "python": platform.python_version(), "population_size": population_size,
+              "generations_requested": generations, "seed": seed}
+    results = []
+    with open(output, "a") as out:
+        for size in sizes:
+            instance = instance_for_genes(size, seed)
+            genes = instance_genes(instance)
+            for engine in engines:
+                if genes > MAX_GENES.get(engine, genes):
+                    continue
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(run_engine, engine, instance, population_size, generations, seed).result()
+                record = {**header, "size": size, "genes": genes, "subjects": len(instance["subjects"]),
+                          "sections": len(instance["sections"]), **result}
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                results.append(record)
+                print(f"{engine:>12} genes={genes:<5} {record['generations_per_sec']:9.1f} gen/s "
+                      f"{record['evaluations_per_sec']:11.1f} eval/s  conflicts={record['best_conflicts']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the GA scripts on seeded synthetic timetables")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="approximate gene counts")
+    parser.add_argument("--population", type=int, default=100)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.jsonl")
+    args = parser.parse_args()
+    run_benchmarks(args.engines, args.sizes, args.population, args.generations, args.seed, args.output)
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ga_fitness import KEY_SIZE
+
+
+# Periodic snapshots of a running evolve(): written every `every` generations and/or
+# every `seconds` seconds of wall-clock time (whichever comes first; both None disables
+# it). A snapshot is one uncompressed .npz file holding the population matrix and its
+# scores, the generation counter, the RNG states, the stopping rule counters, the
+# fitness cache and the score_key of the problem it was taken for, replaced atomically
+# so a crash mid-write leaves the previous snapshot.
+# spent accumulates the seconds spent writing, to check the overhead.
+class Checkpoint:
+    def __init__(self, path, every=None, seconds=60.0):
+        self.path = path
+        self.every = every
+        self.seconds = seconds
+        self.last_saved = time.perf_counter()
+        self.spent = 0.0
+        self.saves = 0
+
+    def due(self, generation):
+        if self.every is not None and generation and generation % self.every == 0:
+            return True
+        return self.seconds is not None and time.perf_counter() - self.last_saved >= self.seconds
+
+    def save(self, **state):
+        started = time.perf_counter()
+        save_snapshot(self.path, **state)
+        self.last_saved = time.perf_counter()
+        self.spent += self.last_saved - started
+        self.saves += 1
+
+
+# Write a snapshot to path atomically (temporary file in the same directory, then rename)
+def save_snapshot(path, problem_key, genes, conflicts, generation, rng, generator, stopping, cache, phase_times,
+                  elapsed):
+    version, internal, gauss_next = rng.getstate()
+    meta = {
+        "problem_key": problem_key,
+        "generation": generation,
+        "rng_version": version,
+        "rng_gauss_next": gauss_next,
+        "generator": generator.bit_generator.state if generator is not None else None,
+        "stopping": stopping.state() if stopping is not None else None,
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+        "phase_times": phase_times,
+        "elapsed": elapsed,
+    }
+    keys = list(cache.entries)
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".npz")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            np.savez(out, genes=genes, conflicts=conflicts, rng_state=np.array(internal, dtype=np.uint32),
+                     cache_keys=np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, KEY_SIZE),
+                     cache_values=np.array(list(cache.entries.values()), dtype=np.int64),
+                     meta=np.array(json.dumps(meta)))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+# Read a snapshot back: a dict with the arrays and the decoded metadata
+def load_snapshot(path):
+    with np.load(path) as data:
+        snapshot = json.loads(data["meta"].item())
+        snapshot["genes"] = data["genes"]
+        snapshot["conflicts"] = data["conflicts"]
+        snapshot["rng_state"] = (snapshot.pop("rng_version"), tuple(data["rng_state"].tolist()),
+                                 snapshot.pop("rng_gauss_next"))
+        snapshot["cache"] = [(key.tobytes(), value) for key, value in zip(data["cache_keys"],
+                                                                          data["cache_values"].tolist())]
+    return snapshot
+
+
+# Put a fitness cache back into the state recorded in a snapshot, bound to the problem the
+# snapshot's scores belong to
+def restore_cache(cache, snapshot):
+    cache.entries.clear()
+    cache.problem_key = snapshot["problem_key"]
+    for key, conflicts in snapshot["cache"]:
+        cache.put(key, conflicts)
+    cache.hits = snapshot["cache_hits"]
+    cache.misses = snapshot["cache_misses"]
@@ -0,0 +1,167 @@
+import argparse
+import sys
+
+
+# Command line entry point: python -m ga_cli {solve,bench,export} ...
+# Every subcommand imports what it needs when it runs, so startup and --help cost no more
+# than argparse, and a solve that doesn't export never loads openpyxl.
+
+
+# Catalog files as given on the command line: subjects [sections [rooms]] (see ga_loader)
+def add_catalog_arguments(parser):
+    parser.add_argument("catalog", nargs="+", metavar="table",
+                        help="subjects table (CSV or workbook), then optionally sections and rooms tables")
+
+
+def load_catalog_arguments(parser, args):
+    from ga_loader import load_catalog
+
+    if len(args.catalog) > 3:
+        parser.error("give at most three tables: subjects, sections and rooms")
+    try:
+        return load_catalog(*args.catalog)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+
+def add_export_arguments(parser, default_output):
+    parser.add_argument("--output", default=default_output, help="Excel workbook to write")
+    parser.add_argument("--csv", default=None, help="also write the schedule as a flat CSV table")
+    parser.add_argument("--parquet", default=None, help="also write it as Parquet (needs pandas)")
+    parser.add_argument("--views", nargs="+", default=None, choices=("section", "room", "instructor"),
+                        help="sheets to write (default: all)")
+
+
+def export(problem, genes, args):
+    from ga_export import VIEWS, export_schedule
+
+    export_schedule(problem, genes, args.output, args.views or VIEWS, args.csv, args.parquet)
+    print(f"Schedule saved to {args.output}")
+
+
+# genetic_algorithm() of ga3.2.py, which can't be imported by name
+def load_solver():
+    from ga_bench import load_engine
+
+    return load_engine("ga3.2")
+
+
+def solve(parser, args):
+    catalog = load_catalog_arguments(parser, args)
+    solver = load_solver()
+    try:
+        operators = None
+        if args.crossover is not None:
+            from ga_operators import BatchOperators
+
+            operators = BatchOperators(args.crossover)
+        best = solver.genetic_algorithm(
+            catalog.subjects, catalog.sections, args.population, args.generations, workers=args.workers,
+            seed=args.seed, islands=args.islands, stall_generations=args.stall_generations,
+            time_budget=args.time_budget, telemetry=args.telemetry, selection=args.selection, operators=operators,
+            repair=args.repair, conflict_types=tuple(args.conflict_types), room_capacity=catalog.room_capacity,
+            local_search=args.local_search, checkpoint=args.checkpoint, resume_from=args.resume,
+            decompose=args.decompose, warm_start=args.warm_start, churn_weight=args.churn_weight,
+            release_instructors=tuple(args.release_instructor), warm_neighbors=args.warm_neighbors)
+    except ValueError as error:
+        parser.error(str(error))
+    result = best.result
+    terms = " ".join(f"{term}={count}" for term, count in result.terms.items())
+    print(f"conflicts={result.conflicts} generations={result.generations} stop={result.stop_reason} "
+          f"elapsed={result.elapsed:.2f}s {terms}")
+    if args.save_genes is not None:
+        import numpy as np
+
+        np.save(args.save_genes, result.genes)
+    if not args.no_export:
+        export(best.problem, result.genes, args)
+    return 0
+
+
+def bench(parser, args):
+    from ga_bench import DEFAULT_SIZES, ENGINES, run_benchmarks
+
+    unknown = [engine for engine in args.engines or () if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)} (choose from {', '.join(ENGINES)})")
+    run_benchmarks(args.engines or list(ENGINES), args.sizes or DEFAULT_SIZES, args.population, args.generations,
+                   args.seed, args.output)
+    return 0
+
+
+# Re-export a saved schedule (a .npy chromosome from solve --save-genes, or an exported
+# CSV or workbook) of a catalog
+def export_command(parser, args):
+    from ga_warm_start import read_schedule
+
+    problem = load_catalog_arguments(parser, args).problem()
+    try:
+        genes = read_schedule(problem, args.schedule)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    unplaced = int((genes < 0).sum())
+    if unplaced:
+        parser.error(f"{args.schedule} doesn't place {unplaced} of the catalog's {problem.n_genes} genes")
+    export(problem, genes, args)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ga_cli", description="Class timetabling GA")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve_parser = commands.add_parser("solve", help="solve a catalog and export the best schedule")
+    add_catalog_arguments(solve_parser)
+    solve_parser.add_argument("--population", type=int, default=100)
+    solve_parser.add_argument("--generations", type=int, default=1000)
+    solve_parser.add_argument("--seed", type=int, default=None)
+    solve_parser.add_argument("--workers", type=int, default=None)
+    solve_parser.add_argument("--islands", type=int, default=None)
+    solve_parser.add_argument("--stall-generations", type=int, default=None)
+    solve_parser.add_argument("--time-budget", type=float, default=None)
+    solve_parser.add_argument("--selection", default="truncation",
+                              choices=("truncation", "tournament", "roulette", "sus", "rank"))
+    solve_parser.add_argument("--crossover", default=None, choices=("uniform", "k_point", "section_block"),
+                              help="batched crossover (see ga_operators)")
+    solve_parser.add_argument("--repair", action="store_true")
+    solve_parser.add_argument("--local-search", default=None, choices=("steepest", "tabu", "annealing"))
+    solve_parser.add_argument("--conflict-types", nargs="+", default=["room"],
+                              choices=("room", "instructor", "section"))
+    solve_parser.add_argument("--decompose", action="store_true")
+    solve_parser.add_argument("--warm-start", default=None, help="previous schedule (.xlsx, .csv or .npy)")
+    solve_parser.add_argument("--churn-weight", type=int, default=1)
+    solve_parser.add_argument("--release-instructor", action="append", default=[])
+    solve_parser.add_argument("--warm-neighbors", action="store_true")
+    solve_parser.add_argument("--checkpoint", default=None)
+    solve_parser.add_argument("--resume", default=None, help="checkpoint to continue from")
+    solve_parser.add_argument("--telemetry", default=None, help="JSONL file for per-generation records")
+    solve_parser.add_argument("--save-genes", default=None, help="also save the best chromosome (.npy)")
+    solve_parser.add_argument("--no-export", action="store_true")
+    add_export_arguments(solve_parser, "schedule.xlsx")
+    solve_parser.set_defaults(run=solve, parser=solve_parser)
+
+    bench_parser = commands.add_parser("bench", help="benchmark the GA scripts on synthetic timetables")
+    bench_parser.add_argument("--engines", nargs="+", default=None)
+    bench_parser.add_argument("--sizes", nargs="+", type=int, default=None, help="approximate gene counts")
+    bench_parser.add_argument("--population", type=int, default=100)
+    bench_parser.add_argument("--generations", type=int, default=100)
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--output", default="bench_results.jsonl")
+    bench_parser.set_defaults(run=bench, parser=bench_parser)
+
+    export_parser = commands.add_parser("export", help="export a saved schedule of a catalog")
+    add_catalog_arguments(export_parser)
+    export_parser.add_argument("--schedule", required=True, help="saved chromosome (.npy), CSV or workbook")
+    add_export_arguments(export_parser, "schedule.xlsx")
+    export_parser.set_defaults(run=export_command, parser=export_parser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.run(args.parser, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
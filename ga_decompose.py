@@ -0,0 +1,122 @@
+import copy
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ga_engine import GAResult, evolve
+from ga_fitness import evaluate_population, penalty_breakdown
+from ga_problem import GENE_DTYPE, ProblemInstance
+from ga_repair import Repair
+
+
+# Groups of subjects whose genes can affect each other's score: two subjects are linked
+# when they share a room (room term), an instructor (instructor term) or, for the section
+# term and the per-section gaps/day_spread terms, a section, which every subject of a
+# section does. Capacity and late slots are per gene and link nothing. The score of a
+# schedule is the sum of the scores of its components, so each can be solved alone.
+# Returns lists of subject ids, largest component first.
+def components(problem):
+    weights = problem.weights
+    parent = list(range(len(problem.subjects)))
+
+    def find(subject_id):
+        while parent[subject_id] != subject_id:
+            parent[subject_id] = parent[parent[subject_id]]
+            subject_id = parent[subject_id]
+        return subject_id
+
+    def link(groups):
+        for subject_ids in groups.values():
+            root = find(subject_ids[0])
+            for subject_id in subject_ids[1:]:
+                parent[find(subject_id)] = root
+
+    if "room" in weights:
+        by_room = {}
+        for subject_id, rooms in enumerate(problem.subject_rooms):
+            for room in rooms:
+                by_room.setdefault(room, []).append(subject_id)
+        link(by_room)
+    if "instructor" in weights:
+        by_instructor = {}
+        for subject_id, instructor in enumerate(problem.subject_instructor):
+            if instructor >= 0:
+                by_instructor.setdefault(instructor, []).append(subject_id)
+        link(by_instructor)
+    if ("section" in weights or "gaps" in weights or "day_spread" in weights) and parent:
+        link({None: list(range(len(parent)))})
+
+    groups = {}
+    for subject_id in range(len(parent)):
+        groups.setdefault(find(subject_id), []).append(subject_id)
+    return sorted(groups.values(), key=lambda subject_ids: (-len(subject_ids), subject_ids[0]))
+
+
+# ProblemInstance over some subjects (all sections), with the problem's scoring settings,
+# and for each of its genes the matching gene of the full problem and room id map
+def subproblem(problem, subject_ids):
+    sub = ProblemInstance([problem.subjects[subject_id] for subject_id in subject_ids], problem.sections, (),
+                          problem.weights, problem.room_capacity, problem.late_start, problem.max_day_span)
+    gene_index = {key: gene for gene, key in enumerate(problem.gene_keys)}
+    genes = np.array([gene_index[key] for key in sub.gene_keys], dtype=np.intp)
+    rooms = np.array([problem.room_index[room] for room in sub.room_names], dtype=GENE_DTYPE)
+    return sub, genes, rooms
+
+
+# Solve one component's subproblem; returns the result. Subproblems are built in the
+# parent: pickled instances don't carry the Subject objects subproblem() needs, and the
+# pool may spawn rather than fork. stopping's time_budget is replaced by the time left
+# until the run's deadline (a time.time() value), so the budget covers the whole run.
+def _solve_component(sub, seed, population_size, generations, stopping, deadline, settings):
+    if deadline is not None:
+        stopping = copy.copy(stopping)
+        stopping.time_budget = max(0.0, deadline - time.time())
+    options = dict(settings)
+    if options.pop("repair"):
+        fixer = Repair(sub)
+        options["repair"] = fixer
+        options["initializer"] = fixer.initialize
+    return evolve(sub, population_size, generations, rng=random.Random(seed), stopping=stopping, **options)
+
+
+# Decomposed solving: the problem is split into components (see components()), each is
+# evolved as its own smaller GA on a pool of `workers` processes (largest first) with
+# its own RNG stream from `seed`, and the best schedules are merged into one chromosome.
+# stopping's target and stall rules apply to every component on its own; its time_budget
+# is one deadline for the whole run, components started later get what is left of it.
+# repair=True gives every component a Repair initializer and repair operator. Returns a
+# GAResult for the whole problem: generations is the most any component ran and
+# stop_reason that component's.
+def solve_components(problem, population_size=100, generations=1000, workers=None, seed=None, stopping=None,
+                     selection="truncation", operators=None, repair=False, local_search=None):
+    started = time.perf_counter()
+    deadline = time.time() + stopping.time_budget if stopping is not None and stopping.time_budget is not None \
+        else None
+    groups = components(problem)
+    seeder = random.Random(seed)
+    seeds = [seeder.getrandbits(64) for _ in groups]
+    settings = {"selection": selection, "operators": operators, "repair": repair, "local_search": local_search}
+    workers = min(workers or os.cpu_count() or 1, len(groups))
+    parts = [subproblem(problem, subject_ids) for subject_ids in groups]
+    tasks = [(sub, component_seed, population_size, generations, stopping, deadline, settings)
+             for (sub, _, _), component_seed in zip(parts, seeds)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve_component, *zip(*tasks)))
+    else:
+        results = [_solve_component(*task) for task in tasks]
+
+    merged = np.empty(problem.n_genes, dtype=GENE_DTYPE)
+    phase_times = {}
+    for (sub, genes, rooms), result in zip(parts, results):
+        starts, sub_rooms = sub.unpack(result.genes)
+        merged[genes] = problem.pack(starts, rooms[sub_rooms])
+        for phase, seconds in result.phase_times.items():
+            phase_times[phase] = phase_times.get(phase, 0.0) + seconds
+    last = max(results, key=lambda result: result.generations)
+    conflicts = int(evaluate_population(problem, merged)[0])
+    return GAResult(merged, conflicts, last.generations, last.stop_reason, time.perf_counter() - started,
+                    phase_times, penalty_breakdown(problem, merged))
@@ -0,0 +1,296 @@
+import random
+import time
+
+import numpy as np
+
+from ga_checkpoint import load_snapshot, restore_cache
+from ga_fitness import FitnessCache, churn_penalty, moved_genes, penalty_breakdown
+from ga_local_search import make_local_search
+from ga_problem import GENE_DTYPE, crossover_into
+from ga_selection import make_selection, numpy_rng
+from ga_telemetry import PHASES, generation_record, population_diversity
+
+
+# Conflict count of a row that has not been scored since it was created or mutated
+UNSCORED = -1
+
+
+# Score every row whose conflicts are UNSCORED, in place
+def score_population(problem, population, conflicts, cache, evaluator=None):
+    dirty = np.flatnonzero(conflicts == UNSCORED)
+    if dirty.size:
+        conflicts[dirty] = cache.evaluate(problem, population[dirty], evaluator)
+
+
+# A population held as one preallocated (size, genes) matrix with its conflict counts,
+# plus a second matrix of the same shape the next generation is written into. The two
+# are swapped every generation, so no chromosome is allocated after initialization:
+# ranking is one gather into the spare buffer, elites are one block copy and children
+# are slice copies between rows.
+class Population:
+    def __init__(self, size, n_genes):
+        self.genes = np.empty((size, n_genes), dtype=GENE_DTYPE)
+        self.conflicts = np.full(size, UNSCORED, dtype=np.int64)
+        self.next_genes = np.empty_like(self.genes)
+        self.next_conflicts = np.empty_like(self.conflicts)
+        self.spare = np.empty(n_genes, dtype=GENE_DTYPE)  # Second child of an odd last pair
+        self.index = np.arange(size)
+
+    def __len__(self):
+        return len(self.genes)
+
+    def swap(self):
+        self.genes, self.next_genes = self.next_genes, self.genes
+        self.conflicts, self.next_conflicts = self.next_conflicts, self.conflicts
+
+    # Move the `count` rows with the fewest conflicts to the front, sorted (stable, like
+    # sorted()); the other rows follow in no particular order. A partial selection
+    # (argpartition) plus a sort of those rows is O(n + count log count).
+    def rank(self, count):
+        size = len(self)
+        key = self.conflicts * size + self.index  # Unique keys make the partition stable
+        if count < size:
+            order = np.argpartition(key, count - 1)
+            top = order[:count]
+            order[:count] = top[np.argsort(key[top])]
+        else:
+            order = np.argsort(key)
+        np.take(self.genes, order, axis=0, out=self.next_genes)
+        np.take(self.conflicts, order, out=self.next_conflicts)
+        self.swap()
+
+    # Start the next generation with the first `count` rows (the elites) and their scores
+    def keep(self, count):
+        self.next_genes[:count] = self.genes[:count]
+        self.next_conflicts[:count] = self.conflicts[:count]
+        self.next_conflicts[count:] = UNSCORED
+
+
+# Early-stopping rules for evolve(); a rule left as None is disabled.
+# target_fitness: stop once the best fitness reaches it (1.0 means zero conflicts)
+# stall_generations: stop after this many generations without a better best
+# time_budget: stop after this many seconds of wall-clock time
+# min_diversity: stop when population_diversity() falls below this floor
+class StoppingCriteria:
+    def __init__(self, target_fitness=None, stall_generations=None, time_budget=None, min_diversity=None):
+        self.target_fitness = target_fitness
+        self.stall_generations = stall_generations
+        self.time_budget = time_budget
+        self.min_diversity = min_diversity
+
+    # elapsed: seconds already run before a resume, counted against time_budget
+    def start(self, elapsed=0.0):
+        self.started = time.perf_counter() - elapsed
+        self.best = None
+        self.stalled = 0
+
+    # Counters a checkpoint needs to resume the rules where they were
+    def state(self):
+        return {"best": None if self.best is None else int(self.best), "stalled": self.stalled}
+
+    def restore(self, state):
+        self.best = state["best"]
+        self.stalled = state["stalled"]
+
+    # Name of the rule that fires for the ranked population, or None to keep going.
+    # churn: the best individual's weighted churn, left out of the target rule
+    def check(self, population, conflicts, churn=0):
+        best = conflicts[0]
+        if self.best is None or best < self.best:
+            self.best = best
+            self.stalled = 0
+        else:
+            self.stalled += 1
+        if self.target_fitness is not None and 1 / (1 + best - churn) >= self.target_fitness:
+            return "target_fitness"
+        if self.stall_generations is not None and self.stalled >= self.stall_generations:
+            return "stall"
+        if self.time_budget is not None and time.perf_counter() - self.started >= self.time_budget:
+            return "time_budget"
+        if self.min_diversity is not None and population_diversity(population) < self.min_diversity:
+            return "min_diversity"
+        return None
+
+
+# Outcome of a GA run: best chromosome and its conflicts (weighted penalty, without the
+# churn of a warm-started run, which is in terms and the churn property), the number
+# of generations run, which rule ended the run ("generations" when the full budget was
+# used), the wall-clock seconds taken, the total seconds spent in each phase and the best
+# chromosome's raw count per penalty term
+class GAResult:
+    def __init__(self, genes, conflicts, generations, stop_reason, elapsed, phase_times=None, terms=None):
+        self.genes = genes
+        self.conflicts = conflicts
+        self.generations = generations
+        self.stop_reason = stop_reason
+        self.elapsed = elapsed
+        self.phase_times = phase_times if phase_times is not None else {}
+        self.terms = terms if terms is not None else {}
+
+    @property
+    def fitness(self):
+        return 1 / (1 + self.conflicts)
+
+    # Genes moved away from the reference schedule of a warm-started run
+    @property
+    def churn(self):
+        return self.terms.get("churn", 0)
+
+
+# Fill the non-elite rows of the next generation one child pair at a time: single-point
+# crossover of two selected parents, then with probability 0.1 one random move in each child
+def breed_pairs(problem, population, elite_count, select, rng, phase_times):
+    clock = time.perf_counter
+    size = len(population)
+    parents = iter(select(population.conflicts, 2 * ((size - elite_count + 1) // 2), rng, elite_count))
+    genes = population.genes
+    children = population.next_genes
+    for row in range(elite_count, size, 2):
+        tick = clock()
+        parent1 = genes[next(parents)]
+        parent2 = genes[next(parents)]
+        child1 = children[row]
+        child2 = children[row + 1] if row + 1 < size else population.spare
+        tock = clock()
+        crossover_into(parent1, parent2, child1, child2, rng)
+        tick2 = clock()
+
+        if rng.random() < 0.1:
+            problem.mutate(child1, rng)
+            problem.mutate(child2, rng)
+
+        phase_times["selection"] += tock - tick
+        phase_times["crossover"] += tick2 - tock
+        phase_times["mutation"] += clock() - tick2
+
+
+# Fill the non-elite rows of the next generation in one pass of the batch operators
+def breed_batch(problem, population, elite_count, select, operators, rng, generator, phase_times):
+    clock = time.perf_counter
+    size = len(population)
+    tick = clock()
+    count = 2 * ((size - elite_count + 1) // 2)
+    parents = np.fromiter(select(population.conflicts, count, rng, elite_count), dtype=np.intp, count=count)
+    children = population.next_genes[elite_count:]
+    tock = clock()
+    operators.recombine(problem, population.genes, parents, children, generator)
+    tick2 = clock()
+    operators.mutate(problem, children, generator)
+    phase_times["selection"] += tock - tick
+    phase_times["crossover"] += tick2 - tock
+    phase_times["mutation"] += clock() - tick2
+
+
+# Generation loop over integer chromosomes stored in a Population.
+# The best half survives as elites and keeps its score, so only new or mutated children
+# are evaluated. selection picks the parents: a name from ga_selection.SELECTIONS or a
+# strategy callable. migrate, if given, is called as migrate(generation, population,
+# conflicts) on the ranked population matrix and conflicts array and updates both in
+# place, keeping the best rows first; the island model uses it to exchange individuals.
+# operators, a ga_operators.BatchOperators, replaces the per-pair single-point crossover and
+# 10% pair mutation with whole-generation numpy kernels.
+# initializer(rng), if given, builds the initial chromosomes instead of problem.initialize,
+# and repair(genes), if given, fixes every child in place before it is scored; see
+# ga_repair.Repair for both.
+# local_search (a ga_local_search.LocalSearch or method name) improves the best
+# individuals every local_search.interval generations (memetic mode).
+# checkpoint (a ga_checkpoint.Checkpoint) snapshots the run periodically; resume_from, the
+# path of such a snapshot, continues that run exactly where it was (same problem,
+# population size and options), with the same result as an uninterrupted run.
+# stopping (a StoppingCriteria) can end the run before `generations`.
+# on_generation, if given, receives a ga_telemetry.generation_record dict every generation.
+def evolve(problem, population_size=100, generations=1000, rng=random, cache=None, evaluator=None,
+           migrate=None, stopping=None, on_generation=None, selection="truncation", operators=None,
+           initializer=None, repair=None, local_search=None, checkpoint=None, resume_from=None):
+    clock = time.perf_counter
+    started = clock()
+    cache = cache if cache is not None else FitnessCache()
+    population = Population(population_size, problem.n_genes)
+    snapshot = load_snapshot(resume_from) if resume_from is not None else None
+    if snapshot is None:
+        initialize = initializer if initializer is not None else problem.initialize
+        for row in population.genes:
+            row[:] = initialize(rng)
+    elite_count = population_size // 2
+    select = make_selection(selection)
+    local_search = make_local_search(local_search)
+    generator = numpy_rng(rng) if operators is not None else None
+    stop_reason = "generations"
+    totals = dict.fromkeys(PHASES, 0.0)
+    first_generation = 0
+    if snapshot is not None:
+        if snapshot["genes"].shape != population.genes.shape:
+            raise ValueError("The snapshot was taken with a different population size or problem")
+        if snapshot.get("problem_key") != problem.score_key:
+            raise ValueError("The snapshot was taken for a different problem (terms, weights, capacities or "
+                             "reference schedule); its scores don't apply to this one")
+        population.genes[:] = snapshot["genes"]
+        population.conflicts[:] = snapshot["conflicts"]
+        rng.setstate(snapshot["rng_state"])
+        if generator is not None and snapshot["generator"] is not None:
+            generator.bit_generator.state = snapshot["generator"]
+        restore_cache(cache, snapshot)
+        totals.update(snapshot["phase_times"])
+        first_generation = snapshot["generation"]
+        started -= snapshot["elapsed"]
+    if stopping is not None:
+        stopping.start(clock() - started)
+        if snapshot is not None and snapshot["stopping"] is not None:
+            stopping.restore(snapshot["stopping"])
+
+    for generation in range(first_generation, generations):
+        if checkpoint is not None and generation > first_generation and checkpoint.due(generation):
+            checkpoint.save(problem_key=problem.score_key, genes=population.genes, conflicts=population.conflicts,
+                            generation=generation, rng=rng, generator=generator, stopping=stopping, cache=cache,
+                            phase_times=totals, elapsed=clock() - started)
+        phase_times = dict.fromkeys(PHASES, 0.0)
+        misses = cache.misses
+        tick = clock()
+        score_population(problem, population.genes, population.conflicts, cache, evaluator)
+        tock = clock()
+        phase_times["evaluation"] = tock - tick
+
+        population.rank(elite_count)
+        phase_times["selection"] = clock() - tock
+        if local_search is not None and generation % local_search.interval == 0:
+            tick = clock()
+            local_search(problem, population.genes, population.conflicts, rng)
+            population.rank(elite_count)
+            phase_times["local_search"] = clock() - tick
+        reason = None
+        if stopping is not None:
+            churn = churn_penalty(problem, population.genes[0])
+            reason = stopping.check(population.genes, population.conflicts, churn)
+        if reason is None and migrate is not None:
+            migrate(generation, population.genes, population.conflicts)
+
+        if reason is None:
+            population.keep(elite_count)
+            if operators is None:
+                breed_pairs(problem, population, elite_count, select, rng, phase_times)
+            else:
+                breed_batch(problem, population, elite_count, select, operators, rng, generator, phase_times)
+            if repair is not None:
+                tick = clock()
+                for child in population.next_genes[elite_count:]:
+                    repair(child)
+                phase_times["repair"] = clock() - tick
+
+        for phase, seconds in phase_times.items():
+            totals[phase] += seconds
+        if on_generation is not None:
+            on_generation(generation_record(generation, population.genes, population.conflicts.tolist(), cache,
+                                            phase_times, clock() - started, cache.misses - misses,
+                                            moved_genes(problem, population.genes), problem.weights.get("churn", 0)))
+        if reason is not None:
+            stop_reason = reason
+            break
+        population.swap()
+    else:
+        generation = generations
+
+    score_population(problem, population.genes, population.conflicts, cache, evaluator)
+    best = int(np.argmin(population.conflicts))
+    genes = population.genes[best].copy()
+    return GAResult(genes, int(population.conflicts[best]) - churn_penalty(problem, genes), generation, stop_reason,
+                    clock() - started, totals, penalty_breakdown(problem, genes))
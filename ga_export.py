@@ -0,0 +1,199 @@
+import csv
+
+import numpy as np
+
+from ga_problem import DAY_START, DAYS, SLOT_MINUTES, TIME_SLOTS
+
+
+# Views a schedule can be exported by: one sheet per section, room or instructor
+VIEWS = ("section", "room", "instructor")
+
+# Sheet title prefix of each view
+VIEW_PREFIX = {"section": "S", "room": "R", "instructor": "I"}
+
+# Columns of the flat CSV/Parquet side outputs, one row per gene
+TABLE_COLUMNS = ("section", "subject", "day", "start", "end", "room", "instructor")
+
+# Characters Excel does not allow in sheet titles, and their maximum length
+INVALID_TITLE_CHARS = str.maketrans({char: "_" for char in "[]:*?/\\"})
+MAX_TITLE_LENGTH = 31
+
+# Decoded columns of a chromosome as parallel integer arrays: section, subject, day,
+# start slot, end slot (exclusive), room and instructor ids (-1 for none)
+def gene_columns(problem, genes):
+    starts, rooms = problem.unpack(np.asarray(genes))
+    return {
+        "section": problem.gene_section,
+        "subject": problem.gene_subject,
+        "day": problem.gene_day,
+        "start": starts,
+        "end": starts + problem.gene_length,
+        "room": rooms,
+        "instructor": problem.gene_instructor,
+    }
+
+
+# Display name tables of the ids in gene_columns (the section name is None without sections)
+def name_tables(problem):
+    return {
+        "section": problem.section_names,
+        "subject": problem.subject_codes,
+        "day": DAYS,
+        "room": problem.room_names,
+        "instructor": problem.instructor_names,
+    }
+
+
+# Unique Excel sheet title for an entity of a view
+def sheet_title(view, name, used):
+    name = name if name is not None else "Schedule"
+    base = f"{VIEW_PREFIX[view]}-{name}".translate(INVALID_TITLE_CHARS)[:MAX_TITLE_LENGTH]
+    title = base
+    copy = 1
+    while title.lower() in used:
+        copy += 1
+        suffix = f" ({copy})"
+        title = base[:MAX_TITLE_LENGTH - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+# Cell text of one gene in a sheet of the given view: the entity itself is left out.
+# start is given for entries added to a block starting at another slot.
+def cell_text(view, names, section, subject, room, instructor, start=None):
+    parts = []
+    if view != "section" and names["section"][section] is not None:
+        parts.append(names["section"][section])
+    parts.append(names["subject"][subject])
+    text = " - ".join(parts)
+    if view != "room":
+        text += f" ({names['room'][room]})"
+    if start is not None:
+        text += f" at {TIME_SLOTS[start]}"
+    if view != "instructor" and instructor >= 0:
+        text += f"\n{names['instructor'][instructor]}"
+    return text
+
+
+# One entity's timetable as cell texts by (slot, day) and merged blocks (slot, day, length).
+# Genes are placed in (day, start) order; one that overlaps an earlier block of the same
+# column is added to that block's text with its own start time, as merged cells cannot
+# overlap.
+def entity_grid(view, names, columns, rows):
+    cells = {}
+    blocks = []
+    used = [0] * len(DAYS)
+    block_start = {}  # (slot, day) -> first slot of the block covering it
+    order = np.lexsort((columns["start"][rows], columns["day"][rows]))
+    for gene in rows[order].tolist():
+        day = int(columns["day"][gene])
+        start = int(columns["start"][gene])
+        length = int(columns["end"][gene]) - start
+        entry = (view, names, columns["section"][gene], columns["subject"][gene], columns["room"][gene],
+                 columns["instructor"][gene])
+        slots = ((1 << length) - 1) << start
+        clash = used[day] & slots
+        if clash:
+            first = block_start[((clash & -clash).bit_length() - 1, day)]
+            cells[(first, day)] += "\n" + cell_text(*entry, start=start if start != first else None)
+            continue
+        cells[(start, day)] = cell_text(*entry)
+        used[day] |= slots
+        for slot in range(start, start + length):
+            block_start[(slot, day)] = start
+        if length > 1:
+            blocks.append((start, day, length))
+    return cells, blocks
+
+
+# Write one entity's sheet row by row; merged ranges are registered before the sheet closes
+def write_sheet(workbook, title, cells, blocks):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment
+    from openpyxl.utils import get_column_letter
+
+    centered = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    sheet = workbook.create_sheet(title)
+    sheet.column_dimensions["A"].width = 8
+    for day in range(len(DAYS)):
+        sheet.column_dimensions[get_column_letter(day + 2)].width = 24
+    sheet.append(["Time"] + DAYS)
+    for slot, time_slot in enumerate(TIME_SLOTS):
+        row = [time_slot] + [None] * len(DAYS)
+        for day in range(len(DAYS)):
+            text = cells.get((slot, day))
+            if text is not None:
+                cell = WriteOnlyCell(sheet, text)
+                cell.alignment = centered
+                row[day + 1] = cell
+        sheet.append(row)
+    for start, day, length in blocks:
+        column = get_column_letter(day + 2)
+        sheet.merged_cells.add(f"{column}{start + 2}:{column}{start + length + 1}")
+
+
+# Flat rows (dicts of TABLE_COLUMNS) of a chromosome, for the side outputs
+def schedule_rows(problem, genes):
+    columns = gene_columns(problem, genes)
+    names = name_tables(problem)
+    for gene in range(problem.n_genes):
+        instructor = int(columns["instructor"][gene])
+        yield {
+            "section": problem.section_names[columns["section"][gene]],
+            "subject": names["subject"][columns["subject"][gene]],
+            "day": DAYS[columns["day"][gene]],
+            "start": TIME_SLOTS[columns["start"][gene]],
+            "end": slot_time(int(columns["end"][gene])),
+            "room": names["room"][columns["room"][gene]],
+            "instructor": names["instructor"][instructor] if instructor >= 0 else None,
+        }
+
+
+# "HH:MM" at which a slot starts; SLOTS_PER_DAY gives the end of the day
+def slot_time(slot):
+    minutes = DAY_START + slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def write_csv(problem, genes, path):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(schedule_rows(problem, genes))
+
+
+# Parquet needs pandas with pyarrow or fastparquet, imported only when asked for
+def write_parquet(problem, genes, path):
+    import pandas as pd
+
+    pd.DataFrame(list(schedule_rows(problem, genes)), columns=TABLE_COLUMNS).to_parquet(path, index=False)
+
+
+# Export a chromosome to an Excel workbook with one timetable sheet per section, room and
+# instructor (views picks which), written in openpyxl write-only mode so every sheet is
+# streamed to disk as it is finished. Row and column indices come straight from the
+# packed genes. csv_path / parquet_path also write the schedule as one flat table.
+# openpyxl is imported here rather than with the module, so importing the GA stays fast.
+def export_schedule(problem, genes, filename="schedule.xlsx", views=VIEWS, csv_path=None, parquet_path=None):
+    from openpyxl import Workbook
+
+    columns = gene_columns(problem, genes)
+    names = name_tables(problem)
+    workbook = Workbook(write_only=True)
+    used = set()
+    for view in views:
+        if view not in VIEWS:
+            raise ValueError(f"Unknown export view: {view}")
+        ids = columns[view]
+        order = np.argsort(ids, kind="stable")
+        bounds = np.flatnonzero(np.diff(ids[order])) + 1
+        for rows in np.split(order, bounds):
+            if not rows.size or ids[rows[0]] < 0:
+                continue  # Genes without an instructor have no instructor sheet
+            cells, blocks = entity_grid(view, names, columns, rows)
+            write_sheet(workbook, sheet_title(view, names[view][ids[rows[0]]], used), cells, blocks)
+    workbook.save(filename)
+    if csv_path is not None:
+        write_csv(problem, genes, csv_path)
+    if parquet_path is not None:
+        write_parquet(problem, genes, parquet_path)
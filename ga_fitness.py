@@ -0,0 +1,193 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from ga_problem import DAYS, RESOURCES, SLOTS_PER_DAY
+
+
+# Upper bound on occupancy counters materialized at once; populations whose
+# (pop, day, slot, room) tensor would be larger are evaluated in chunks
+MAX_TENSOR_CELLS = 1 << 22
+
+
+# Count how many genes of each individual occupy every (day, slot, resource) cell.
+# population is a (pop, genes) matrix of packed genes; returns a (pop, day, slot, resource)
+# tensor for rooms, instructors or sections.
+def occupancy_counts(problem, population, resource="room"):
+    population = np.atleast_2d(population)
+    pop = population.shape[0]
+    n_cells = len(DAYS) * SLOTS_PER_DAY * problem.resource_count(resource)
+    cells = problem.occupied_cells(population, resource)
+    cells = cells + (np.arange(pop) * n_cells)[:, None]
+    counts = np.bincount(cells.ravel(), minlength=pop * n_cells)
+    return counts.reshape(pop, len(DAYS), SLOTS_PER_DAY, -1)
+
+
+# Idle slots between the first and last class, and slots by which that span exceeds
+# max_day_span, of every (individual, day, section); busy is a (pop, day, slot, section)
+# boolean tensor. Returns both summed per individual.
+def day_shape_counts(problem, busy):
+    busy = busy.transpose(0, 1, 3, 2)
+    used = busy.any(axis=-1)
+    first = np.argmax(busy, axis=-1)
+    last = SLOTS_PER_DAY - 1 - np.argmax(busy[..., ::-1], axis=-1)
+    span = np.where(used, last - first + 1, 0)
+    gaps = span - busy.sum(axis=-1)
+    spread = np.maximum(0, span - problem.max_day_span)
+    return gaps.sum(axis=(1, 2)), spread.sum(axis=(1, 2))
+
+
+# Raw count of every weighted penalty term (see ga_problem.TERMS) for each individual,
+# in one vectorized pass per term: {term: (pop,) int64 array}.
+# A cell holding n genes counts as n - 1 double-bookings, the same as the dict based check.
+def term_counts(problem, population):
+    population = np.atleast_2d(population)
+    pop = population.shape[0]
+    weights = problem.weights
+    counts = {term: np.zeros(pop, dtype=np.int64) for term in weights}
+    shaped = "gaps" in weights or "day_spread" in weights
+    for resource in RESOURCES:
+        if resource not in weights and not (resource == "section" and shaped):
+            continue
+        n_cells = len(DAYS) * SLOTS_PER_DAY * problem.resource_count(resource)
+        chunk = max(1, MAX_TENSOR_CELLS // max(1, n_cells))
+        slots = problem.instructor_slots.size if resource == "instructor" else problem.cell_gene.size
+        for first in range(0, pop, chunk):
+            occupancy = occupancy_counts(problem, population[first:first + chunk], resource)
+            if resource in weights:
+                flat = occupancy.reshape(occupancy.shape[0], -1)
+                counts[resource][first:first + chunk] = slots - np.count_nonzero(flat, axis=1)
+            if resource == "section" and shaped:
+                gaps, spread = day_shape_counts(problem, occupancy > 0)
+                if "gaps" in weights:
+                    counts["gaps"][first:first + chunk] = gaps
+                if "day_spread" in weights:
+                    counts["day_spread"][first:first + chunk] = spread
+    if "capacity" in weights or "late" in weights:
+        starts, rooms = problem.unpack(population)
+        genes = np.arange(problem.n_genes)
+        if "capacity" in weights:
+            counts["capacity"] = problem.over_capacity[genes, rooms].sum(axis=1, dtype=np.int64)
+        if "late" in weights:
+            counts["late"] = problem.late_slots[genes, starts].sum(axis=1, dtype=np.int64)
+    if "churn" in weights:
+        referenced = problem.referenced
+        counts["churn"] = np.count_nonzero(population[:, referenced] != problem.reference[referenced], axis=1)
+    return counts
+
+
+# Weighted penalty of every individual: the sum of its term counts times the problem's
+# weights. With the default weights this is the number of room double-bookings.
+def evaluate_population(problem, population):
+    population = np.atleast_2d(population)
+    conflicts = np.zeros(population.shape[0], dtype=np.int64)
+    for term, counts in term_counts(problem, population).items():
+        conflicts += problem.weights[term] * counts
+    return conflicts
+
+
+# Genes placed away from their warm-start reference, of one chromosome (an int) or of every
+# row of a population (an array); 0 without a churn term
+def moved_genes(problem, genes):
+    if "churn" not in problem.weights:
+        return 0
+    referenced = problem.referenced
+    moved = np.count_nonzero(genes[..., referenced] != problem.reference[referenced], axis=-1)
+    return int(moved) if np.ndim(moved) == 0 else moved
+
+
+# Weighted churn term of one chromosome, 0 without one. Churn ranks warm-started
+# schedules but isn't a conflict: results report it apart and the target rule ignores it.
+def churn_penalty(problem, genes):
+    return problem.weights.get("churn", 0) * moved_genes(problem, genes)
+
+
+# Term counts of one chromosome as plain ints, e.g. for reporting the best schedule
+def penalty_breakdown(problem, genes):
+    return {term: int(counts[0]) for term, counts in term_counts(problem, genes).items()}
+
+
+# Bytes in a chromosome key
+KEY_SIZE = 16
+
+
+# Content hash of a chromosome, so identical individuals share one cache entry
+def chromosome_key(genes):
+    return hashlib.blake2b(np.ascontiguousarray(genes).tobytes(), digest_size=KEY_SIZE).digest()
+
+
+# Bounded LRU of conflict counts keyed by chromosome content; hits/misses are counted for
+# reporting. A cache is bound to the problem it first scores (by its score_key, so runs
+# on the same inputs can share it) and refuses to score any other.
+class FitnessCache:
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.problem_key = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        conflicts = self.entries.get(key)
+        if conflicts is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return conflicts
+
+    def put(self, key, conflicts):
+        self.entries[key] = conflicts
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Same result as evaluate_population, but only chromosomes not seen before are
+    # evaluated (once each, even if several rows are identical). evaluator, if given,
+    # scores the missing rows instead, e.g. a ga_parallel.PoolEvaluator.
+    def evaluate(self, problem, population, evaluator=None):
+        if self.problem_key is None:
+            self.problem_key = problem.score_key
+        elif self.problem_key != problem.score_key:
+            raise ValueError("This FitnessCache holds scores of a different problem (terms, weights, "
+                             "capacities or reference schedule)")
+        population = np.atleast_2d(population)
+        conflicts = np.empty(population.shape[0], dtype=np.int64)
+        missing = {}  # key -> rows waiting for that chromosome's score
+        for row, genes in enumerate(population):
+            key = chromosome_key(genes)
+            if key in missing:
+                self.hits += 1
+                missing[key].append(row)
+                continue
+            cached = self.get(key)
+            if cached is None:
+                missing[key] = [row]
+            else:
+                conflicts[row] = cached
+        if missing:
+            unseen = population[[rows[0] for rows in missing.values()]]
+            scores = evaluator(unseen) if evaluator is not None else evaluate_population(problem, unseen)
+            for (key, rows), score in zip(missing.items(), scores.tolist()):
+                conflicts[rows] = score
+                self.put(key, score)
+        return conflicts
+
+
+# Conflicts of a single chromosome
+def count_conflicts(problem, genes):
+    return int(evaluate_population(problem, genes)[0])
+
+
+# Fewer conflicts means higher fitness
+def fitness_from_conflicts(conflicts):
+    return 1 / (1 + conflicts)
@@ -0,0 +1,329 @@
+import csv
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+from ga_problem import DAYS, DURATION_MINUTES, SLOT_INDEX, ProblemInstance
+
+
+# Per-user cache directory of parsed catalogs: $XDG_CACHE_HOME (or ~/.cache)/ga_timetable,
+# %LOCALAPPDATA%\ga_timetable on Windows
+def default_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "ga_timetable")
+
+
+# Parsed catalogs are cached here, one pickle per set of input files. Cache files are
+# unpickled on a hit, so whatever is in this directory is trusted: it is created private
+# to the user, and must not be pointed at a directory others can write to.
+CACHE_DIR = default_cache_dir()
+
+# Bumped whenever the parsed format changes, so stale cache files are ignored
+CACHE_VERSION = 1
+
+# Columns of each table; multi-valued cells (days, rooms, instructor_avail) hold values
+# separated by ";". Only the subject code, duration, days and rooms are required.
+SUBJECT_COLUMNS = ("code", "name", "duration", "days", "rooms", "instructor", "instructor_avail", "num_students")
+REQUIRED_SUBJECT_COLUMNS = ("code", "duration", "days", "rooms")
+SECTION_COLUMNS = ("section",)
+ROOM_COLUMNS = ("room", "capacity")
+
+LIST_SEPARATOR = ";"
+MULTI_VALUED_COLUMNS = ("days", "rooms", "instructor_avail")
+
+
+# One catalog subject, with the attributes of ga3.2.py's Subject so ProblemInstance and the
+# exports accept it as is
+class CatalogSubject:
+    def __init__(self, code, name, duration, available_days, rooms, instructor, instructor_avail, num_students):
+        self.code = code
+        self.name = name
+        self.duration = duration
+        self.available_days = available_days
+        self.rooms = rooms
+        self.instructor = instructor
+        self.instructor_avail = instructor_avail
+        self.num_students = num_students
+
+
+class CatalogSection:
+    def __init__(self, section_name):
+        self.section_name = section_name
+
+
+# Subjects, sections (None when the catalog has none) and room capacities (None without a
+# rooms table) read from spreadsheets
+class Catalog:
+    def __init__(self, subjects, sections, room_capacity):
+        self.subjects = subjects
+        self.sections = sections
+        self.room_capacity = room_capacity
+
+    # Compiled ProblemInstance; options are passed to it (conflict_types, weights, ...)
+    def problem(self, **options):
+        if self.room_capacity is not None:
+            options.setdefault("room_capacity", self.room_capacity)
+        return ProblemInstance(self.subjects, self.sections, **options)
+
+
+# Rows of one table as (row number, {column: value}) with lower-cased headers and blank rows
+# skipped. CSV files are read as text; workbooks in openpyxl read-only mode, from the sheet
+# named after the table (any case) or else the first one, so rows are streamed rather
+# than loaded as a whole. openpyxl is only imported for workbooks.
+def table_rows(path, table):
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            yield from _rows(csv.reader(handle))
+        return
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = {name.lower(): name for name in workbook.sheetnames}
+        sheet = workbook[sheets[table]] if table in sheets else workbook.worksheets[0]
+        yield from _rows(sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _rows(rows):
+    header = None
+    for number, row in enumerate(rows, start=1):
+        values = ["" if value is None else str(value).strip() for value in row]
+        if not any(values):
+            continue
+        if header is None:
+            header = [value.lower() for value in values]
+            continue
+        yield number, dict(zip(header, values))
+
+
+# Whether a workbook has a sheet for the table (CSV files hold exactly one table)
+def has_table(path, table):
+    if path.lower().endswith(".csv"):
+        return False
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return table in (name.lower() for name in workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+# Split a multi-valued cell (or take a JSON list as is), interning every value: each name
+# is one shared string object
+def split_list(cell):
+    values = cell if isinstance(cell, list) else cell.split(LIST_SEPARATOR)
+    return [sys.intern(str(value).strip()) for value in values if str(value).strip()]
+
+
+# "HH:MM" for a time cell; workbooks may hold times as datetime.time ("08:00:00")
+def normalize_time(value):
+    return value[:5] if len(value) == 8 and value[2] == ":" and value[5] == ":" else value
+
+
+# Subjects, sections and rooms from (row number, {column: value}) rows; source names
+# the file (or request) in error messages
+def parse_subjects(rows, source):
+    subjects = []
+    seen = set()
+    for number, row in rows:
+        where = f"{source}, row {number}"
+        missing = [column for column in REQUIRED_SUBJECT_COLUMNS if not row.get(column)]
+        if missing:
+            raise ValueError(f"{where}: missing {', '.join(missing)}")
+        code = sys.intern(str(row["code"]))
+        if code in seen:
+            raise ValueError(f"{where}: duplicate subject code {code}")
+        seen.add(code)
+        if row["duration"] not in DURATION_MINUTES:
+            raise ValueError(f"{where}: unknown duration {row['duration']!r}")
+        days = split_list(row["days"])
+        unknown = [day for day in days if day not in DAYS]
+        if unknown:
+            raise ValueError(f"{where}: unknown day {unknown[0]!r}")
+        avail = [normalize_time(time) for time in split_list(row.get("instructor_avail") or "")]
+        unknown = [time for time in avail if time not in SLOT_INDEX]
+        if unknown:
+            raise ValueError(f"{where}: unknown time slot {unknown[0]!r}")
+        students = row.get("num_students") or "0"
+        try:
+            students = int(float(students))
+        except (TypeError, ValueError):
+            raise ValueError(f"{where}: num_students is not a number: {students!r}") from None
+        instructor = sys.intern(str(row["instructor"])) if row.get("instructor") else None
+        subjects.append(CatalogSubject(code, row.get("name", ""), sys.intern(row["duration"]), days,
+                                       split_list(row["rooms"]), instructor, avail or None, students))
+    if not subjects:
+        raise ValueError(f"{source}: no subjects")
+    return subjects
+
+
+def parse_sections(rows, source):
+    sections = []
+    seen = set()
+    for number, row in rows:
+        name = row.get("section")
+        if not name:
+            raise ValueError(f"{source}, row {number}: missing section")
+        if name in seen:
+            raise ValueError(f"{source}, row {number}: duplicate section {name}")
+        seen.add(name)
+        sections.append(CatalogSection(sys.intern(name)))
+    return sections
+
+
+def parse_rooms(rows, source):
+    capacity = {}
+    for number, row in rows:
+        room = row.get("room")
+        if not room:
+            raise ValueError(f"{source}, row {number}: missing room")
+        try:
+            capacity[sys.intern(room)] = int(float(row["capacity"])) if row.get("capacity") else None
+        except (TypeError, ValueError):
+            raise ValueError(f"{source}, row {number}: capacity is not a number: {row['capacity']!r}") from None
+    return capacity
+
+
+def read_subjects(path):
+    return parse_subjects(table_rows(path, "subjects"), path)
+
+
+def read_sections(path):
+    return parse_sections(table_rows(path, "sections"), path)
+
+
+def read_rooms(path):
+    return parse_rooms(table_rows(path, "rooms"), path)
+
+
+# Every room a subject lists must be in the rooms table, when there is one
+def validate_rooms(subjects, room_capacity, path):
+    for subject in subjects:
+        for room in subject.rooms:
+            if room not in room_capacity:
+                raise ValueError(f"{path}: subject {subject.code} uses unknown room {room!r}")
+
+
+# Catalog from parsed tables, checking subject rooms against the rooms table
+def build_catalog(subjects, sections, rooms, source):
+    room_capacity = None
+    if rooms is not None:
+        validate_rooms(subjects, rooms, source)
+        room_capacity = {room: seats for room, seats in rooms.items() if seats is not None}
+    return Catalog(subjects, sections, room_capacity)
+
+
+# A JSON cell as the table readers see it: text, or for multi-valued columns a list of
+# texts. Numbers are taken as their text and null as an empty cell.
+def json_cell(value, column, where):
+    if isinstance(value, list) and column in MULTI_VALUED_COLUMNS:
+        return [json_cell(item, None, where) for item in value]
+    if value is None:
+        return ""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{where}: {column or 'list item'} must be text or a number, not {value!r}")
+    return value if isinstance(value, str) else str(value)
+
+
+# Catalog from JSON-style data: {"subjects": [{column: value}], "sections": [name or
+# {"section": name}], "rooms": {room: seats} or [{"room": room, "capacity": seats}]}, with
+# the table columns above; multi-valued columns may be lists. Sections and rooms are
+# optional. Data of the wrong shape raises ValueError like a bad table does.
+def catalog_from_data(data, source="request"):
+    def rows(items, table):
+        where = f"{source} {table}"
+        if not isinstance(items, list):
+            raise ValueError(f"{where}: expected a list")
+        for number, item in enumerate(items, start=1):
+            if table == "sections" and isinstance(item, (str, int)) and not isinstance(item, bool):
+                item = {"section": item}
+            if not isinstance(item, dict):
+                raise ValueError(f"{where}, row {number}: expected an object")
+            yield number, {str(column).lower(): json_cell(value, str(column).lower(), f"{where}, row {number}")
+                           for column, value in item.items()}
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected an object")
+    sections = data.get("sections")
+    if sections is not None:
+        sections = parse_sections(rows(sections, "sections"), f"{source} sections")
+    rooms = data.get("rooms")
+    if rooms is not None:
+        if isinstance(rooms, dict):
+            rooms = [{"room": room, "capacity": seats} for room, seats in rooms.items()]
+        rooms = parse_rooms(rows(rooms, "rooms"), f"{source} rooms")
+    subjects = data.get("subjects")
+    return build_catalog(parse_subjects(rows(subjects if subjects is not None else [], "subjects"),
+                                        f"{source} subjects"), sections, rooms, source)
+
+
+# Cache file for a set of input files: keyed by their absolute paths, sizes and
+# modification times, so an edited file is parsed again
+def cache_path(cache_dir, paths):
+    key = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    for path in paths:
+        stat = os.stat(path) if path is not None else None
+        key.update(repr((os.path.abspath(path) if path else None,
+                         stat and (stat.st_size, stat.st_mtime_ns))).encode())
+    return os.path.join(cache_dir, key.hexdigest() + ".pickle")
+
+
+# Load a catalog from CSV files or workbooks.
+# subjects: the subjects table. sections/rooms: their tables, optional; for a workbook
+# holding "Sections" or "Rooms" sheets they default to that workbook. Rooms without a
+# capacity have no limit. Raises ValueError naming the file and row of the first invalid
+# entry. The parsed catalog is cached in cache_dir (None disables the cache).
+def load_catalog(subjects, sections=None, rooms=None, cache_dir=CACHE_DIR):
+    # Keyed by the files as given, so a cache hit doesn't open the workbook at all
+    cached = cache_path(cache_dir, (subjects, sections, rooms)) if cache_dir is not None else None
+    if cached is not None and os.path.exists(cached):
+        try:
+            with open(cached, "rb") as handle:
+                catalog = pickle.load(handle)
+            if isinstance(catalog, Catalog):
+                return catalog
+        except Exception:
+            pass  # Unreadable, stale or foreign cache file: parse again and overwrite it
+    if sections is None and has_table(subjects, "sections"):
+        sections = subjects
+    if rooms is None and has_table(subjects, "rooms"):
+        rooms = subjects
+    catalog = build_catalog(read_subjects(subjects), read_sections(sections) if sections is not None else None,
+                            read_rooms(rooms) if rooms is not None else None, subjects)
+    if cached is not None:
+        write_cache(cached, catalog)
+    return catalog
+
+
+# Store a parsed catalog atomically (temporary file in the cache directory, then rename).
+# A cache that can't be written (read-only or full disk) only costs the next load a parse,
+# so OSError is ignored; the temporary file is removed whatever goes wrong.
+def write_cache(cached, catalog):
+    directory = os.path.dirname(cached)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(handle, "wb") as out:
+            pickle.dump(catalog, out, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cached)
+    except OSError:
+        os.unlink(temporary)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+# Compiled ProblemInstance straight from the catalog files; options go to ProblemInstance
+def load_problem(subjects, sections=None, rooms=None, cache_dir=CACHE_DIR, **options):
+    return load_catalog(subjects, sections, rooms, cache_dir).problem(**options)
@@ -0,0 +1,121 @@
+import math
+
+from ga_occupancy import ScoreIndex
+
+
+# Bounded local search over single-gene moves, applied to the best individuals of a GA
+# population (memetic mode). Every move is priced with ScoreIndex.delta, so a step costs
+# a few bit operations instead of a rescore.
+# method: "steepest" - sample `candidates` random moves, take the best one if it improves;
+#         "tabu" - take the best sampled move whose gene is not tabu, even if it is worse
+#                  (a move reaching a new best is always allowed); a moved gene stays
+#                  tabu for `tenure` steps;
+#         "annealing" - simulated annealing: accept a random move if it does not worsen
+#                  the score, else with probability exp(-delta / T); T starts at
+#                  `temperature` and is multiplied by `cooling` after every move.
+# moves: move evaluations allowed per individual (the budget).
+# Every `interval` generations the top `elites` individuals are improved.
+class LocalSearch:
+    METHODS = ("steepest", "tabu", "annealing")
+
+    def __init__(self, method="steepest", moves=500, interval=10, elites=2, candidates=20, tenure=10,
+                 temperature=2.0, cooling=0.995):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown local search method: {method}")
+        self.method = method
+        self.moves = moves
+        self.interval = interval
+        self.elites = elites
+        self.candidates = candidates
+        self.tenure = tenure
+        self.temperature = temperature
+        self.cooling = cooling
+
+    # Improve the first `elites` rows of a ranked population in place and update their scores
+    def __call__(self, problem, population, conflicts, rng):
+        for row in range(min(self.elites, len(population))):
+            conflicts[row] = self.improve(problem, population[row], rng)
+
+    # Improve one chromosome in place; returns its new score
+    def improve(self, problem, genes, rng):
+        index = ScoreIndex(problem, genes)
+        if self.method == "steepest":
+            return self.steepest(problem, index, genes, rng)
+        if self.method == "tabu":
+            return self.tabu(problem, index, genes, rng)
+        return self.annealing(problem, index, genes, rng)
+
+    # Best of up to `count` sampled moves that are allowed by `allowed(gene, delta)`,
+    # as (delta, gene, value), or None
+    def best_sampled(self, problem, index, genes, rng, count, allowed=None):
+        best = None
+        for _ in range(count):
+            gene, value = problem.random_move(rng)
+            delta = index.delta(gene, genes[gene], value)
+            if (best is None or delta < best[0]) and (allowed is None or allowed(gene, delta)):
+                best = (delta, gene, value)
+        return best
+
+    def steepest(self, problem, index, genes, rng):
+        budget = self.moves
+        while budget > 0 and index.conflicts:
+            count = min(self.candidates, budget)
+            budget -= count
+            best = self.best_sampled(problem, index, genes, rng, count)
+            if best is not None and best[0] < 0:
+                _, gene, value = best
+                index.move(gene, genes[gene], value)
+                genes[gene] = value
+        return index.conflicts
+
+    def tabu(self, problem, index, genes, rng):
+        best_score = index.conflicts
+        best_genes = genes.copy()
+        tabu_until = {}
+        step = 0
+        budget = self.moves
+        while budget > 0 and best_score:
+            count = min(self.candidates, budget)
+            budget -= count
+            step += 1
+            current = index.conflicts
+            best = self.best_sampled(problem, index, genes, rng, count,
+                                     lambda gene, delta: tabu_until.get(gene, 0) <= step
+                                     or current + delta < best_score)
+            if best is None:
+                continue
+            _, gene, value = best
+            index.move(gene, genes[gene], value)
+            genes[gene] = value
+            tabu_until[gene] = step + self.tenure
+            if index.conflicts < best_score:
+                best_score = index.conflicts
+                best_genes[:] = genes
+        genes[:] = best_genes
+        return best_score
+
+    def annealing(self, problem, index, genes, rng):
+        best_score = index.conflicts
+        best_genes = genes.copy()
+        temperature = self.temperature
+        for _ in range(self.moves):
+            if not best_score:
+                break
+            gene, value = problem.random_move(rng)
+            delta = index.delta(gene, genes[gene], value)
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                index.move(gene, genes[gene], value)
+                genes[gene] = value
+                if index.conflicts < best_score:
+                    best_score = index.conflicts
+                    best_genes[:] = genes
+            temperature = max(temperature * self.cooling, 1e-9)
+        genes[:] = best_genes
+        return best_score
+
+
+# LocalSearch for a method name (default settings) or a LocalSearch, used as is
+def make_local_search(local_search):
+    if local_search is None or isinstance(local_search, LocalSearch):
+        return local_search
+    return LocalSearch(local_search)
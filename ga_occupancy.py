@@ -0,0 +1,238 @@
+import numpy as np
+
+from ga_fitness import occupancy_counts
+from ga_problem import DAYS, RESOURCES, SLOTS_PER_DAY
+
+
+# A resource's week is one int with bit day * SLOTS_PER_DAY + slot set for every busy
+# 30-minute slot (6 days x 28 slots = 168 bits)
+WEEK_BITS = len(DAYS) * SLOTS_PER_DAY
+
+
+# Weekly bitmask of the slots one gene covers when it starts at `start`
+def placement_mask(problem, gene, start):
+    return ((1 << problem._gene_length[gene]) - 1) << (problem._gene_row[gene] + start)
+
+
+# Busy slots of one resource: the OR of its counter planes
+def busy_mask(planes):
+    busy = 0
+    for plane in planes:
+        busy |= plane
+    return busy
+
+
+# Counter planes of every id of one resource from its booking counts, a (day, slot, id)
+# array: bit day * SLOTS_PER_DAY + slot of plane k is bit k of that slot's count
+def counter_planes(counts):
+    counts = counts.reshape(WEEK_BITS, -1).T
+    levels = [np.packbits(counts >> level & 1, axis=1, bitorder="little")
+              for level in range(int(counts.max(initial=0)).bit_length())]
+    planes = []
+    for row in range(counts.shape[0]):
+        row_planes = [int.from_bytes(level[row].tobytes(), "little") for level in levels]
+        while row_planes and not row_planes[-1]:
+            row_planes.pop()
+        planes.append(row_planes)
+    return planes
+
+
+# Occupancy of every room, instructor and section of one chromosome with a running
+# conflict count per resource type.
+# Each resource keeps a bit-sliced counter of its week: plane k holds bit k of every
+# slot's booking count, so adding or removing a placement is a ripple carry/borrow of
+# ANDs and XORs over a few ints, and the slots it double-books are one AND plus a
+# popcount against the busy mask (the OR of the planes). A cell holding n genes counts
+# as n - 1 conflicts, the same as evaluate_population.
+# resources defaults to the problem's conflict_types; conflicts sums all tracked types.
+# A chromosome given up front is counted in one vectorized pass (see load).
+class OccupancyIndex:
+    def __init__(self, problem, genes=None, resources=None):
+        resources = tuple(resources) if resources is not None else problem.conflict_types
+        for resource in resources:
+            if resource not in RESOURCES:
+                raise ValueError(f"Unknown resource: {resource}")
+        self.problem = problem
+        self.resources = resources
+        self.planes = {resource: [[] for _ in range(problem.resource_count(resource))] for resource in RESOURCES}
+        self.conflicts_by_type = dict.fromkeys(resources, 0)
+        self.conflicts = 0
+        if genes is not None:
+            self.load({resource: occupancy_counts(self.problem, genes, resource)[0] for resource in resources})
+
+    # Replace the tracked resources' occupancy with the given booking counts
+    # ({resource: (day, slot, id) array} of one chromosome, as from occupancy_counts)
+    def load(self, counts):
+        problem = self.problem
+        for resource in self.resources:
+            self.planes[resource] = counter_planes(counts[resource])
+            slots = problem.instructor_slots.size if resource == "instructor" else problem.cell_gene.size
+            self.conflicts_by_type[resource] = slots - int(np.count_nonzero(counts[resource]))
+        self.conflicts = sum(self.conflicts_by_type.values())
+
+    # (resource, counter planes) of every tracked resource the gene uses in `room`
+    def counters(self, gene, room, resources=None):
+        problem = self.problem
+        found = []
+        for resource in resources if resources is not None else self.resources:
+            if resource == "room":
+                found.append((resource, self.planes["room"][room]))
+            elif resource == "section":
+                found.append((resource, self.planes["section"][problem._gene_section[gene]]))
+            elif problem._gene_instructor[gene] >= 0:
+                found.append((resource, self.planes["instructor"][problem._gene_instructor[gene]]))
+        return found
+
+    # Busy slots of the week across every tracked resource the gene uses in `room`
+    def busy(self, gene, room, resources=None):
+        busy = 0
+        for _, planes in self.counters(gene, room, resources):
+            busy |= busy_mask(planes)
+        return busy
+
+    # Start slots (bit s = start s) at which the gene would fit into `room` on its day
+    # without touching a busy slot; starts too late for the gene's length are not checked
+    def free_starts(self, gene, room, resources=None):
+        busy = self.busy(gene, room, resources)
+        spread = busy
+        for shift in range(1, self.problem._gene_length[gene]):
+            spread |= busy >> shift
+        return ~(spread >> self.problem._gene_row[gene]) & ((1 << SLOTS_PER_DAY) - 1)
+
+    # Slots the gene would double-book at packed value `value`, summed over resources
+    def overlap(self, gene, value, resources=None):
+        start, room = divmod(int(value), self.problem.n_rooms)
+        mask = placement_mask(self.problem, gene, start)
+        return sum((busy_mask(planes) & mask).bit_count() for _, planes in self.counters(gene, room, resources))
+
+    # Book the gene's slots; returns the conflicts this adds
+    def add(self, gene, value):
+        start, room = divmod(int(value), self.problem.n_rooms)
+        mask = placement_mask(self.problem, gene, start)
+        added = 0
+        for resource, planes in self.counters(gene, room):
+            clashes = (busy_mask(planes) & mask).bit_count()
+            carry = mask
+            for level, plane in enumerate(planes):
+                planes[level] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+            self.conflicts_by_type[resource] += clashes
+            added += clashes
+        self.conflicts += added
+        return added
+
+    # Free the gene's slots; returns the conflicts this removes
+    def remove(self, gene, value):
+        start, room = divmod(int(value), self.problem.n_rooms)
+        mask = placement_mask(self.problem, gene, start)
+        removed = 0
+        for resource, planes in self.counters(gene, room):
+            borrow = mask
+            for level, plane in enumerate(planes):
+                planes[level] = plane ^ borrow
+                borrow &= ~plane
+                if not borrow:
+                    break
+            while planes and not planes[-1]:
+                planes.pop()
+            clashes = (busy_mask(planes) & mask).bit_count()  # Slots still booked were double-booked
+            self.conflicts_by_type[resource] -= clashes
+            removed += clashes
+        self.conflicts -= removed
+        return removed
+
+    # Move a gene from its old to a new packed value; returns the change in conflicts
+    def move(self, gene, old_value, new_value):
+        before = self.conflicts
+        self.remove(gene, old_value)
+        self.add(gene, new_value)
+        return self.conflicts - before
+
+    # Change in conflicts the move would cause, leaving the index untouched
+    def delta(self, gene, old_value, new_value):
+        change = self.move(gene, old_value, new_value)
+        self.move(gene, new_value, old_value)
+        return change
+
+
+# Incremental weighted score of one chromosome: every term of problem.weights (see
+# ga_problem.TERMS) kept up to date move by move, so soft terms cost a few int operations
+# per move instead of a rescore. Double-bookings come from an OccupancyIndex; capacity,
+# late slots and churn are looked up per gene in the problem's precomputed tables; gaps and
+# day_spread are cached per (section, day) and recomputed from that day's busy bits only
+# when one of its genes moves. conflicts is the weighted total, as in evaluate_population;
+# terms holds the raw count of each term.
+class ScoreIndex:
+    def __init__(self, problem, genes=None):
+        weights = problem.weights
+        self.problem = problem
+        self.weights = weights
+        self.shaped = "gaps" in weights or "day_spread" in weights
+        resources = tuple(resource for resource in RESOURCES
+                          if resource in weights or (resource == "section" and self.shaped))
+        self.occupancy = OccupancyIndex(problem, resources=resources)
+        self.terms = dict.fromkeys(weights, 0)
+        self.day_terms = {}  # (section, day row) -> (gaps, day_spread) of that section's day
+        self.conflicts = 0
+        if genes is not None:
+            for gene, value in enumerate(genes.tolist()):
+                self.add(gene, value)
+
+    # (gaps, day_spread) of one section's day from its busy bits
+    def day_shape(self, section, row):
+        day = busy_mask(self.occupancy.planes["section"][section]) >> row & ((1 << SLOTS_PER_DAY) - 1)
+        if not day:
+            return 0, 0
+        first = (day & -day).bit_length() - 1
+        span = day.bit_length() - first
+        return span - day.bit_count(), max(0, span - self.problem.max_day_span)
+
+    # Apply `sign` (1 to add, -1 to remove) times the gene's own terms, around the
+    # occupancy update done by `update`
+    def _update(self, gene, value, sign, update):
+        problem = self.problem
+        terms = self.terms
+        start, room = divmod(int(value), problem.n_rooms)
+        key = (problem._gene_section[gene], problem._gene_row[gene])
+        if self.shaped:
+            old_gaps, old_spread = self.day_terms.get(key, (0, 0))
+        update(gene, value)
+        for resource, count in self.occupancy.conflicts_by_type.items():
+            if resource in terms:
+                terms[resource] = count
+        if "capacity" in terms:
+            terms["capacity"] += sign * problem._over_capacity[gene][room]
+        if "late" in terms:
+            terms["late"] += sign * problem._late_slots[gene][start]
+        if "churn" in terms and problem._reference[gene] >= 0:
+            terms["churn"] += sign * (int(value) != problem._reference[gene])
+        if self.shaped:
+            gaps, spread = self.day_terms[key] = self.day_shape(*key)
+            if "gaps" in terms:
+                terms["gaps"] += gaps - old_gaps
+            if "day_spread" in terms:
+                terms["day_spread"] += spread - old_spread
+        self.conflicts = sum(self.weights[term] * count for term, count in terms.items())
+
+    def add(self, gene, value):
+        self._update(gene, value, 1, self.occupancy.add)
+
+    def remove(self, gene, value):
+        self._update(gene, value, -1, self.occupancy.remove)
+
+    # Move a gene from its old to a new packed value; returns the change in the score
+    def move(self, gene, old_value, new_value):
+        before = self.conflicts
+        self.remove(gene, old_value)
+        self.add(gene, new_value)
+        return self.conflicts - before
+
+    # Change in the score the move would cause, leaving the index untouched
+    def delta(self, gene, old_value, new_value):
+        change = self.move(gene, old_value, new_value)
+        self.move(gene, new_value, old_value)
+        return change
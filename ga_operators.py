@@ -0,0 +1,78 @@
+import numpy as np
+
+
+# Crossover masks for `pairs` parent pairs: True where the first child takes the gene from
+# the first parent (the second child gets the other parent's gene)
+
+# Every gene from either parent with equal odds
+def uniform_mask(problem, pairs, generator, points):
+    return generator.random((pairs, problem.n_genes)) < 0.5
+
+
+# `points` random cut points per pair; the source parent alternates at every cut
+def k_point_mask(problem, pairs, generator, points):
+    cuts = generator.integers(1, max(2, problem.n_genes), size=(pairs, points, 1))
+    crossed = (np.arange(problem.n_genes) >= cuts).sum(axis=1)
+    return crossed % 2 == 0
+
+
+# Whole sections from either parent, so a section's timetable is inherited intact
+# (without sections the chromosome is one block and pairs are copied unchanged or swapped)
+def section_block_mask(problem, pairs, generator, points):
+    sections = generator.random((pairs, len(problem.section_names))) < 0.5
+    return sections[:, problem.gene_section]
+
+
+CROSSOVERS = {
+    "uniform": uniform_mask,
+    "k_point": k_point_mask,
+    "section_block": section_block_mask,
+}
+
+
+# Variation operators applied to a whole generation at once.
+# All crossover masks, mutation masks and new (start slot, room) values of a generation
+# are drawn in a few numpy calls, and children are built with masked selects between
+# parent rows instead of one Python call per child or gene.
+# crossover: a name in CROSSOVERS; points: cut points for "k_point".
+# mutation_rate: probability that a child gene is moved to a random legal placement,
+# either one rate or an array with one rate per gene; None means 1 / n_genes.
+class BatchOperators:
+    def __init__(self, crossover="uniform", points=2, mutation_rate=None):
+        if crossover not in CROSSOVERS:
+            raise ValueError(f"Unknown crossover: {crossover}")
+        self.crossover = crossover
+        self.points = points
+        self.mutation_rate = mutation_rate
+        self.buffers = None
+
+    # Parent and mask buffers, reused while the shapes stay the same
+    def _buffers(self, pairs, n_genes, dtype):
+        if self.buffers is None or self.buffers[0].shape != (pairs, n_genes):
+            self.buffers = (np.empty((pairs, n_genes), dtype=dtype), np.empty((pairs, n_genes), dtype=dtype))
+        return self.buffers
+
+    # Fill children (a (count, genes) view of the next generation) from the parent rows of
+    # population listed in parents (two per child pair)
+    def recombine(self, problem, population, parents, children, generator):
+        count = len(children)
+        pairs = (count + 1) // 2
+        first, second = self._buffers(pairs, problem.n_genes, population.dtype)
+        np.take(population, parents[0::2][:pairs], axis=0, out=first)
+        np.take(population, parents[1::2][:pairs], axis=0, out=second)
+        mask = CROSSOVERS[self.crossover](problem, pairs, generator, self.points)
+        np.copyto(children[0::2], second)
+        np.copyto(children[0::2], first, where=mask)
+        half = count // 2
+        np.copyto(children[1::2], first[:half])
+        np.copyto(children[1::2], second[:half], where=mask[:half])
+
+    # Move every child gene picked by the per-gene mutation mask, in place (pinned genes stay)
+    def mutate(self, problem, children, generator):
+        rate = self.mutation_rate if self.mutation_rate is not None else 1 / problem.n_genes
+        mask = generator.random(children.shape) < rate
+        if problem.pinned is not None:
+            mask &= ~problem.pinned
+        rows, genes = np.nonzero(mask)
+        if genes.size:
+            children[rows, genes] = problem.random_values(genes, generator)
@@ -0,0 +1,198 @@
+import multiprocessing
+import os
+import queue
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ga_engine import evolve
+from ga_fitness import evaluate_population
+from ga_telemetry import JsonlWriter
+
+
+# Problem tables of this worker process, installed once by the pool initializer
+_worker_problem = None
+
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _evaluate_chunk(population):
+    return evaluate_population(_worker_problem, population)
+
+
+# Scores populations on a process pool. The ProblemInstance is shipped to every worker
+# once at start-up; each call only sends compact (rows, genes) integer chunks.
+# Evaluation is deterministic and never touches the RNG, so runs are identical to serial mode.
+class PoolEvaluator:
+    def __init__(self, problem, workers, min_chunk=8):
+        self.problem = problem
+        self.workers = workers
+        self.min_chunk = min_chunk  # Smaller batches are cheaper to score in-process
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(problem,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    # Same result as evaluate_population(problem, population)
+    def __call__(self, population):
+        population = np.atleast_2d(population)
+        chunks = min(self.workers, len(population) // self.min_chunk)
+        if chunks <= 1:
+            return evaluate_population(self.problem, population)
+        return np.concatenate(list(self.executor.map(_evaluate_chunk, np.array_split(population, chunks))))
+
+
+# Destination islands of every island for a migration topology: "ring" sends to the
+# next island, "complete" to all others. A callable topology(island, islands) may
+# return any list of destinations.
+def migration_targets(topology, islands):
+    if callable(topology):
+        return [list(topology(island, islands)) for island in range(islands)]
+    if topology == "ring":
+        return [[(island + 1) % islands] if islands > 1 else [] for island in range(islands)]
+    if topology == "complete":
+        return [[other for other in range(islands) if other != island] for island in range(islands)]
+    raise ValueError(f"Unknown migration topology: {topology}")
+
+
+# Periodic exchange of the best individuals between islands.
+# Every interval generations an island sends its top migrants to its destinations and
+# waits for one batch from each of its sources, so runs are reproducible. Messages are
+# tagged (source, epoch); a None epoch means the source has finished.
+class Migration:
+    def __init__(self, island, interval, migrants, inbox, outboxes, sources):
+        self.island = island
+        self.interval = interval
+        self.migrants = migrants
+        self.inbox = inbox
+        self.outboxes = outboxes
+        self.live_sources = set(sources)
+        self.pending = {}  # (source, epoch) -> batch that arrived early
+
+    def __call__(self, generation, population, conflicts):
+        if generation == 0 or generation % self.interval:
+            return
+        epoch = generation // self.interval
+        # Copies: the queue pickles in a background thread, after the rows may be overwritten
+        batch = (population[:self.migrants].copy(), conflicts[:self.migrants].copy())
+        for outbox in self.outboxes:
+            outbox.put((self.island, epoch, batch))
+
+        arrived = []
+        for source in sorted(self.live_sources):
+            while (source, epoch) not in self.pending and source in self.live_sources:
+                sender, sent_epoch, sent_batch = self.inbox.get()
+                if sent_epoch is None:
+                    self.live_sources.discard(sender)
+                else:
+                    self.pending[(sender, sent_epoch)] = sent_batch
+            if (source, epoch) in self.pending:
+                arrived.append(self.pending.pop((source, epoch)))
+
+        # Immigrants replace the worst individuals, then the population is re-sorted in place
+        if arrived and self.migrants:
+            genes = np.concatenate([batch_genes for batch_genes, _ in arrived])[-len(population):]
+            scores = np.concatenate([batch_scores for _, batch_scores in arrived])[-len(population):]
+            worst = np.argpartition(conflicts, len(conflicts) - len(scores))[len(conflicts) - len(scores):]
+            population[worst] = genes
+            conflicts[worst] = scores
+            order = np.argsort(conflicts, kind="stable")
+            population[:] = population[order]
+            conflicts[:] = conflicts[order]
+
+    # Tell the destinations no more migrants will come from this island
+    def close(self):
+        for outbox in self.outboxes:
+            outbox.put((self.island, None, None))
+
+
+# JSONL telemetry file of one island: runs.jsonl -> runs.island2.jsonl
+def island_telemetry_path(path, island):
+    root, ext = os.path.splitext(path)
+    return f"{root}.island{island}{ext}"
+
+
+def _run_island(island, problem, seed, settings, inboxes, targets, sources, results):
+    migration = Migration(island, settings["migration_interval"], settings["migrants"], inboxes[island],
+                          [inboxes[target] for target in targets], sources)
+    writer = None
+    if settings["telemetry"] is not None:
+        writer = JsonlWriter(island_telemetry_path(settings["telemetry"], island), island=island)
+    try:
+        result = evolve(problem, settings["population_size"], settings["generations"], rng=random.Random(seed),
+                        migrate=migration, stopping=settings["stopping"], on_generation=writer,
+                        selection=settings["selection"], operators=settings["operators"],
+                        initializer=settings["initializer"], repair=settings["repair"],
+                        local_search=settings["local_search"])
+    finally:
+        migration.close()
+        if writer is not None:
+            writer.close()
+    results.put((island, result))
+
+
+# Island model: runs `islands` independent populations, one per process, each with its
+# own RNG stream, exchanging their top `migrants` individuals along `topology` every
+# `migration_interval` generations. Each island applies `stopping`, `selection`,
+# `operators`, `initializer`, `repair` and `local_search` on its own and, if a telemetry
+# path is given, streams its records to island_telemetry_path(telemetry, island).
+# Returns the GAResult of the island that found the best individual.
+def run_islands(problem, islands, population_size=100, generations=1000, migration_interval=10, migrants=2,
+                topology="ring", seed=None, stopping=None, telemetry=None, selection="truncation",
+                operators=None, initializer=None, repair=None, local_search=None):
+    targets = migration_targets(topology, islands)
+    sources = [[source for source in range(islands) if island in targets[source]] for island in range(islands)]
+    seeder = random.Random(seed)
+    seeds = [seeder.getrandbits(64) for _ in range(islands)]
+    settings = {"population_size": population_size, "generations": generations,
+                "migration_interval": migration_interval, "migrants": migrants, "stopping": stopping,
+                "telemetry": telemetry, "selection": selection, "operators": operators,
+                "initializer": initializer, "repair": repair, "local_search": local_search}
+
+    inboxes = [multiprocessing.Queue() for _ in range(islands)]
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_run_island,
+                                         args=(island, problem, seeds[island], settings, inboxes,
+                                               targets[island], sources[island], results))
+                 for island in range(islands)]
+    for process in processes:
+        process.start()
+    # Drain results before joining so no process blocks on a full queue
+    finished = []
+    while len(finished) < islands:
+        try:
+            finished.append(results.get(timeout=1))
+        except queue.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                for process in processes:
+                    process.terminate()
+                raise RuntimeError("An island process failed")
+    # Islands stop on their own rules, so migrants can still be sent to one that has already
+    # stopped; nothing reads them, and a sender can't exit until its queue's feeder thread
+    # has flushed them into the pipe. Every island is done with its inbox by now: drain them
+    # all until the processes have exited.
+    while any(process.is_alive() for process in processes):
+        for inbox in inboxes:
+            try:
+                while True:
+                    inbox.get_nowait()
+            except queue.Empty:
+                pass
+        for process in processes:
+            process.join(timeout=0.05)
+    for process in processes:
+        process.join()
+
+    _, result = min(finished, key=lambda finished_island: (finished_island[1].conflicts, finished_island[1].churn,
+                                                           finished_island[0]))
+    return result
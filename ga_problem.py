@@ -0,0 +1,373 @@
+import hashlib
+
+import numpy as np
+
+
+# Days a subject can be scheduled on, in the column order used by the exports
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+# Classes run from 7:00 AM to 9:00 PM in 30-minute slots
+DAY_START = 7 * 60
+DAY_END = 21 * 60
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = (DAY_END - DAY_START) // SLOT_MINUTES
+TIME_SLOTS = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(DAY_START, DAY_END, SLOT_MINUTES)]
+SLOT_INDEX = {time_slot: i for i, time_slot in enumerate(TIME_SLOTS)}
+
+# Supported subject durations in minutes
+DURATION_MINUTES = {"1 hour and 30 mins": 90, "3 hours": 180, "5 hours": 300}
+
+# Each gene packs (start slot, room id) into one integer: start * n_rooms + room
+GENE_DTYPE = np.int32
+
+# Resources that can be double-booked: rooms, instructors and sections
+RESOURCES = ("room", "instructor", "section")
+
+# Penalty terms a schedule is scored on. Hard: slots double-booked per resource, and
+# meetings in a room with fewer seats than students. Soft: slots at or after late_start,
+# idle slots between a section's classes on a day, and slots by which a section's day
+# (first start to last end) runs longer than max_day_span, and genes moved away from their
+# placement in a reference schedule (churn, for re-scheduling). Meeting days are fixed per
+# gene, so only start times and rooms move these.
+HARD_TERMS = RESOURCES + ("capacity",)
+SOFT_TERMS = ("late", "gaps", "day_spread", "churn")
+TERMS = HARD_TERMS + SOFT_TERMS
+
+
+# Number of 30-minute slots a subject of the given duration occupies
+def duration_slots(duration):
+    if duration not in DURATION_MINUTES:
+        raise ValueError("Invalid duration")
+    return DURATION_MINUTES[duration] // SLOT_MINUTES
+
+
+# (days, rooms, instructor, instructor start times) of a subject.
+# ga3.2.py subjects have available_days/rooms/instructor with instructor_avail holding times;
+# ga3.py/ga3.1.py subjects have days/room_avail and list instructors in instructor_avail.
+def subject_fields(subject):
+    if hasattr(subject, "available_days"):
+        return subject.available_days, subject.rooms, subject.instructor, subject.instructor_avail
+    instructor = subject.instructor_avail[0] if subject.instructor_avail else None
+    return subject.days, subject.room_avail, instructor, None
+
+
+# Compiled integer view of a timetabling problem.
+# Names (sections, subjects, days, rooms) are mapped to small integer ids once, so a
+# chromosome is just a flat array with one packed (start slot, room) value per gene.
+# Without sections (ga3.py/ga3.1.py) genes are keyed (subject_code, day) instead of
+# (section, subject_code, day).
+# A schedule's score (its "conflicts") is the weighted sum of TERMS counts: conflict_types
+# lists the RESOURCES whose double-bookings count with weight 1, and weights ({term: int})
+# adds or overrides terms. room_capacity ({room: seats}) is needed for the capacity term;
+# rooms missing from it have no limit.
+# reference (a chromosome, -1 for genes it doesn't place) is the schedule churn is
+# counted against, and seeds initialize(). pinned (a bool mask) marks genes that keep
+# their reference placement: mutation, local search and repair only move the others.
+class ProblemInstance:
+    def __init__(self, subjects, sections=None, conflict_types=("room",), weights=None, room_capacity=None,
+                 late_start="18:00", max_day_span=16, reference=None, pinned=None):
+        self.weights = dict.fromkeys(conflict_types, 1)
+        self.weights.update(weights or {})
+        for term, weight in self.weights.items():
+            if term not in TERMS:
+                raise ValueError(f"Unknown penalty term: {term}")
+            # Scores are integer counts, so weights must be integers too
+            if not isinstance(weight, (int, np.integer)):
+                raise ValueError(f"The weight of {term} must be an integer, not {weight!r}")
+        if self.weights.get("capacity") and room_capacity is None:
+            raise ValueError("The capacity term needs room_capacity")
+        if (self.weights.get("churn") or pinned is not None) and reference is None:
+            raise ValueError("The churn term and pinned genes need a reference schedule")
+        self.weights = {term: weight for term, weight in self.weights.items() if weight}
+        self.subjects = subjects
+        self.sections = sections
+        self.conflict_types = tuple(resource for resource in RESOURCES if resource in self.weights)
+        self.room_capacity = room_capacity
+        self.late_start = late_start
+        self.late_slot = SLOT_INDEX[late_start]
+        self.max_day_span = max_day_span
+        fields = [subject_fields(subject) for subject in subjects]
+
+        # id <-> name tables
+        self.subject_codes = [subject.code for subject in subjects]
+        self.subject_index = {code: i for i, code in enumerate(self.subject_codes)}
+        self.section_names = [section.section_name for section in sections] if sections is not None else [None]
+        self.section_index = {name: i for i, name in enumerate(self.section_names)}
+        self.day_index = {day: i for i, day in enumerate(DAYS)}
+        self.room_names = []
+        self.room_index = {}
+        for _, rooms, _, _ in fields:
+            for room in rooms:
+                if room not in self.room_index:
+                    self.room_index[room] = len(self.room_names)
+                    self.room_names.append(room)
+        self.n_rooms = len(self.room_names)
+        self.instructor_names = []
+        self.instructor_index = {}
+        for _, _, instructor, _ in fields:
+            if instructor is not None and instructor not in self.instructor_index:
+                self.instructor_index[instructor] = len(self.instructor_names)
+                self.instructor_names.append(instructor)
+        # Instructor id of every subject, -1 when it has none
+        self.subject_instructor = [self.instructor_index.get(instructor, -1) for _, _, instructor, _ in fields]
+
+        # Per-duration tables, compiled once: legal start slots (as indices and "HH:MM"),
+        # and for each start the range of slots it occupies (as indices and "HH:MM")
+        self.duration_starts = {}
+        self.duration_start_times = {}
+        self.duration_occupied = {}
+        self.duration_occupied_times = {}
+        for duration in dict.fromkeys(subject.duration for subject in subjects):
+            length = duration_slots(duration)
+            starts = list(range(SLOTS_PER_DAY - length + 1))
+            self.duration_starts[duration] = starts
+            self.duration_start_times[duration] = [TIME_SLOTS[start] for start in starts]
+            self.duration_occupied[duration] = [range(start, start + length) for start in starts]
+            self.duration_occupied_times[duration] = {
+                TIME_SLOTS[start]: [TIME_SLOTS[slot] for slot in range(start, start + length)] for start in starts}
+
+        # Per-subject move tables: legal start slots and allowed room ids. A start is legal
+        # when the subject fits in the day from it and, for subjects listing their
+        # instructor's available start times, when it is one of them. Initialization,
+        # mutation, local search, repair and warm starts all place genes from these tables.
+        self.subject_length = []
+        self.subject_starts = []
+        self.subject_rooms = []
+        for subject, (_, rooms, _, avail_times) in zip(subjects, fields):
+            length = duration_slots(subject.duration)
+            starts = self.duration_starts[subject.duration]
+            if avail_times is not None:
+                avail = {SLOT_INDEX[t] for t in avail_times if t in SLOT_INDEX}
+                starts = [start for start in starts if start in avail]
+                if not starts:
+                    raise ValueError(f"No legal start time for {subject.code} within its instructor's availability")
+            self.subject_length.append(length)
+            self.subject_starts.append(starts)
+            self.subject_rooms.append([self.room_index[room] for room in rooms])
+
+        # Padded array copies of the move tables for batched moves: row s holds subject s's
+        # legal start slots (room ids), valid up to start_count[s] (room_count[s])
+        self.start_count = np.array([len(starts) for starts in self.subject_starts], dtype=np.int32)
+        self.start_table = np.zeros((len(subjects), max(self.start_count, default=1)), dtype=np.int32)
+        self.room_count = np.array([len(rooms) for rooms in self.subject_rooms], dtype=np.int32)
+        self.room_table = np.zeros((len(subjects), max(self.room_count, default=1)), dtype=np.int32)
+        for subject_id, (starts, rooms) in enumerate(zip(self.subject_starts, self.subject_rooms)):
+            self.start_table[subject_id, :len(starts)] = starts
+            self.room_table[subject_id, :len(rooms)] = rooms
+
+        # Gene layout: one gene per (section, subject, day), in the same order the dict
+        # based Schedule used. Each (section, subject) pair is a block sharing one placement
+        # at initialization time.
+        self.gene_keys = []
+        self.blocks = []
+        gene_section, gene_subject, gene_day = [], [], []
+        for section_id, section_name in enumerate(self.section_names):
+            for subject_id, (subject, (days, _, _, _)) in enumerate(zip(subjects, fields)):
+                block_start = len(self.gene_keys)
+                for day in days:
+                    key = (subject.code, day) if sections is None else (section_name, subject.code, day)
+                    self.gene_keys.append(key)
+                    gene_section.append(section_id)
+                    gene_subject.append(subject_id)
+                    gene_day.append(self.day_index[day])
+                self.blocks.append((block_start, len(self.gene_keys), subject_id))
+        self.n_genes = len(self.gene_keys)
+        self.gene_section = np.array(gene_section, dtype=np.int32)
+        self.gene_subject = np.array(gene_subject, dtype=np.int32)
+        self.gene_day = np.array(gene_day, dtype=np.int32)
+        self.gene_length = np.array(self.subject_length, dtype=np.int32)[self.gene_subject]
+        self.gene_instructor = np.array(self.subject_instructor, dtype=np.int32)[self.gene_subject]
+
+        # Flattened (gene, slot offset) pairs for every 30-minute slot a gene occupies,
+        # used to expand a chromosome into occupancy cell ids without a Python loop
+        self.cell_gene = np.repeat(np.arange(self.n_genes), self.gene_length)
+        gene_first_cell = np.cumsum(self.gene_length) - self.gene_length
+        self.cell_offset = np.arange(self.cell_gene.size) - np.repeat(gene_first_cell, self.gene_length)
+        self.n_cells = len(DAYS) * SLOTS_PER_DAY * self.n_rooms
+        # Slots of genes that have an instructor, the only ones instructor cells cover
+        self.instructor_slots = np.flatnonzero(self.gene_instructor[self.cell_gene] >= 0)
+
+        # Per-gene penalty tables: over_capacity[gene, room] is 1 when the room seats fewer
+        # students than the gene's subject has, late_slots[gene, start] the slots at or after
+        # late_start the gene covers when starting at `start`
+        seats = np.full(self.n_rooms, np.iinfo(np.int64).max)
+        for room, capacity in (room_capacity or {}).items():
+            if room in self.room_index:
+                seats[self.room_index[room]] = capacity
+        students = np.array([subject.num_students for subject in subjects], dtype=np.int64)[self.gene_subject]
+        self.over_capacity = (students[:, None] > seats[None, :]).astype(np.int32)
+        starts = np.arange(SLOTS_PER_DAY)[None, :]
+        ends = starts + self.gene_length[:, None]
+        self.late_slots = np.maximum(0, ends - np.maximum(starts, self.late_slot)).astype(np.int32)
+
+        # Plain-list copies for the scalar lookups done once per move
+        self._gene_row = (self.gene_day * SLOTS_PER_DAY).tolist()
+        self._gene_length = self.gene_length.tolist()
+        self._gene_subject = self.gene_subject.tolist()
+        self._gene_section = self.gene_section.tolist()
+        self._gene_instructor = self.gene_instructor.tolist()
+        self._over_capacity = self.over_capacity.tolist()
+        self._late_slots = self.late_slots.tolist()
+
+        # Warm start: the reference chromosome, the genes it places, and the genes that may move
+        self.reference = None
+        self.pinned = None
+        if reference is not None:
+            self.reference = np.asarray(reference, dtype=GENE_DTYPE)
+            if self.reference.shape != (self.n_genes,):
+                raise ValueError("The reference schedule doesn't match the problem's genes")
+            self.referenced = np.flatnonzero(self.reference >= 0)
+            self._reference = self.reference.tolist()
+        if pinned is not None:
+            self.pinned = np.asarray(pinned, dtype=bool)
+            if (self.reference[self.pinned] < 0).any():
+                raise ValueError("Pinned genes need a placement in the reference schedule")
+            self.movable = np.flatnonzero(~self.pinned)
+            if not self.movable.size:
+                raise ValueError("Every gene is pinned")
+            self._movable = self.movable.tolist()
+        self._score_key = None
+
+    # Pickled copies (worker processes, snapshots) only carry the compiled tables,
+    # not the script's Subject/Section objects
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["subjects"] = None
+        state["sections"] = None
+        return state
+
+    # Content hash of everything a chromosome's score depends on: the weights, the gene
+    # layout and the penalty and reference tables. Problems compiled from the same inputs
+    # share it, so a FitnessCache can tell whether its scores belong to a problem.
+    @property
+    def score_key(self):
+        if self._score_key is None:
+            key = hashlib.blake2b(repr((sorted(self.weights.items()), self.n_rooms, self.max_day_span,
+                                        len(self.instructor_names), len(self.section_names))).encode(),
+                                  digest_size=16)
+            for table in (self.gene_day, self.gene_length, self.gene_instructor, self.gene_section,
+                          self.over_capacity, self.late_slots, self.reference):
+                key.update(np.ascontiguousarray(table).tobytes() if table is not None else b"-")
+            self._score_key = key.hexdigest()
+        return self._score_key
+
+    # Subject object for a subject code
+    def subject(self, code):
+        return self.subjects[self.subject_index[code]]
+
+    # Legal "HH:MM" start times for a duration
+    def start_times(self, duration):
+        return self.duration_start_times[duration]
+
+    # "HH:MM" slots used by a class of the given duration starting at start_time
+    def occupied_times(self, start_time, duration):
+        return self.duration_occupied_times[duration][start_time]
+
+    def pack(self, start, room):
+        return start * self.n_rooms + room
+
+    # Split packed genes into (start slot, room id) arrays
+    def unpack(self, genes):
+        return np.divmod(genes, self.n_rooms)
+
+    # Random chromosome: every (section, subject) block gets one legal start time and one
+    # room, repeated on all of the subject's days.
+    # With a reference schedule, only its unpinned genes are placed at random.
+    def initialize(self, rng):
+        if self.reference is not None:
+            return self.warm_initialize(rng)
+        genes = np.empty(self.n_genes, dtype=GENE_DTYPE)
+        for block_start, block_end, subject_id in self.blocks:
+            start = rng.choice(self.subject_starts[subject_id])
+            room = rng.choice(self.subject_rooms[subject_id])
+            genes[block_start:block_end] = self.pack(start, room)
+        return genes
+
+    # The reference schedule with one random placement per block for the genes it doesn't
+    # place and, in about half of the chromosomes, for all unpinned genes
+    def warm_initialize(self, rng):
+        genes = self.reference.copy()
+        free = self.reference < 0
+        if self.pinned is not None and rng.random() < 0.5:
+            free = ~self.pinned
+        for block_start, block_end, subject_id in self.blocks:
+            block_free = np.flatnonzero(free[block_start:block_end])
+            if block_free.size:
+                start = rng.choice(self.subject_starts[subject_id])
+                room = rng.choice(self.subject_rooms[subject_id])
+                genes[block_start + block_free] = self.pack(start, room)
+        return genes
+
+    # Pick one random gene and a random legal (start slot, room) for it.
+    # Returns (gene index, new packed value).
+    def random_move(self, rng):
+        if self.pinned is None:
+            gene = rng.randrange(self.n_genes)
+        else:
+            gene = self._movable[rng.randrange(len(self._movable))]
+        subject_id = self._gene_subject[gene]
+        start = rng.choice(self.subject_starts[subject_id])
+        room = rng.choice(self.subject_rooms[subject_id])
+        return gene, self.pack(start, room)
+
+    # Random legal packed values for an array of gene indices, from a numpy Generator
+    def random_values(self, genes, generator):
+        subject = self.gene_subject[genes]
+        start = self.start_table[subject, (generator.random(len(genes)) * self.start_count[subject]).astype(np.intp)]
+        room = self.room_table[subject, (generator.random(len(genes)) * self.room_count[subject]).astype(np.intp)]
+        return (start * self.n_rooms + room).astype(GENE_DTYPE)
+
+    # Move one random gene to a random legal start slot and room, in place.
+    # Returns the index of the changed gene.
+    def mutate(self, genes, rng):
+        gene, value = self.random_move(rng)
+        genes[gene] = value
+        return gene
+
+    # Number of rooms, instructors or sections
+    def resource_count(self, resource):
+        if resource == "room":
+            return self.n_rooms
+        if resource == "instructor":
+            return len(self.instructor_names)
+        return len(self.section_names)
+
+    # Occupancy cell id ((day * SLOTS_PER_DAY + slot) * count + resource id) of every slot
+    # used, for rooms, instructors or sections. Works on one chromosome or a (pop, genes) matrix.
+    def occupied_cells(self, genes, resource="room"):
+        starts, rooms = self.unpack(genes)
+        count = self.resource_count(resource)
+        ids = rooms if resource == "room" else self.gene_instructor if resource == "instructor" else self.gene_section
+        first_cell = (self.gene_day * SLOTS_PER_DAY + starts) * count + ids
+        cells = first_cell[..., self.cell_gene] + self.cell_offset * count
+        return cells[..., self.instructor_slots] if resource == "instructor" else cells
+
+    def encode(self, schedule):
+        genes = np.empty(self.n_genes, dtype=GENE_DTYPE)
+        for gene, key in enumerate(self.gene_keys):
+            start_time, room = schedule[key]
+            genes[gene] = self.pack(SLOT_INDEX[start_time], self.room_index[room])
+        return genes
+
+    # Back to the {(section, subject_code, day): ("HH:MM", room)} form, for export
+    def decode(self, genes):
+        starts, rooms = self.unpack(genes)
+        return {key: (TIME_SLOTS[start], self.room_names[room])
+                for key, start, room in zip(self.gene_keys, starts.tolist(), rooms.tolist())}
+
+
+# Single-point crossover of two parent rows written into two preallocated child rows
+def crossover_into(parent1, parent2, child1, child2, rng):
+    point = rng.randint(0, len(parent1) - 1)
+    child1[:point] = parent1[:point]
+    child1[point:] = parent2[point:]
+    child2[:point] = parent2[:point]
+    child2[point:] = parent1[point:]
+
+
+# Single-point crossover on two chromosomes
+def crossover(parent1, parent2, rng):
+    child1 = np.empty_like(parent1)
+    child2 = np.empty_like(parent2)
+    crossover_into(parent1, parent2, child1, child2, rng)
+    return child1, child2
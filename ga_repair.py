@@ -0,0 +1,152 @@
+import numpy as np
+
+from ga_fitness import occupancy_counts
+from ga_occupancy import OccupancyIndex, placement_mask
+from ga_problem import GENE_DTYPE, SLOTS_PER_DAY
+
+
+# Start-slot bitmask with every start of the day set
+ALL_STARTS = (1 << SLOTS_PER_DAY) - 1
+
+
+# Greedy repair and conflict-light initialization.
+# Only the double-bookings the problem counts are guarded: `resources` defaults to its
+# conflict_types. A gene that double-books any of them moves to the nearest free legal
+# start (inside its instructor's availability, see ProblemInstance.subject_starts), trying
+# its current room first and then its other rooms. When no placement is free for every
+# resource, one free for its room alone is taken; when there is none either, the gene
+# stays put, or goes to the nearest legal start in its room if it was outside them.
+class Repair:
+    def __init__(self, problem, resources=None):
+        self.problem = problem
+        self.resources = tuple(resources) if resources is not None else problem.conflict_types
+        # Legal starts of each subject ordered by distance from every possible current start
+        self.nearest = [[sorted(starts, key=lambda candidate: abs(candidate - start))
+                         for start in range(SLOTS_PER_DAY)] for starts in problem.subject_starts]
+        # The same starts as a start-slot bitmask per subject
+        self.legal = [sum(1 << start for start in starts) for starts in problem.subject_starts]
+        # ... and as a (subject, start) boolean table for whole chromosomes
+        self.legal_table = np.zeros((len(problem.subject_starts), SLOTS_PER_DAY), dtype=bool)
+        for subject_id, starts in enumerate(problem.subject_starts):
+            self.legal_table[subject_id, starts] = True
+        # Rooms are tested room by room; the other resources of a gene don't depend on the room
+        self.by_room = "room" in self.resources
+        self.others = tuple(resource for resource in self.resources if resource != "room")
+
+    # Free start bits of the gene for its non-room resources, then for each room. A start is
+    # free for every resource where both are set; without a match, free in the room alone
+    # is enough (the relaxed pass).
+    def free_starts(self, occupancy, gene, rooms):
+        free_others = occupancy.free_starts(gene, None, self.others) if self.others else ALL_STARTS
+        free_rooms = [occupancy.free_starts(gene, room, ("room",)) if self.by_room else ALL_STARTS for room in rooms]
+        return free_others, free_rooms
+
+    def passes(self, free_others):
+        return (free_others, ALL_STARTS) if self.by_room and self.others else (free_others,)
+
+    # Free packed value for the gene nearest to `value`, or None. A room's free starts are
+    # only worked out once an earlier room had none, and rooms without a free legal start
+    # are skipped before their starts are scanned. room_free, if given, caches the free
+    # starts of the gene's other rooms as {room: {(day row, length): bits}}; the caller drops
+    # a room's entry whenever a gene moves in or out of it.
+    def nearest_free(self, occupancy, gene, value, room_free=None):
+        problem = self.problem
+        subject_id = problem._gene_subject[gene]
+        start, room = divmod(int(value), problem.n_rooms)
+        legal = self.legal[subject_id]
+        rooms = [room] + [other for other in problem.subject_rooms[subject_id] if other != room]
+        free_others = occupancy.free_starts(gene, None, self.others) if self.others else ALL_STARTS
+        shape = (problem._gene_row[gene], problem._gene_length[gene])
+        room_free = room_free if room_free is not None else {}
+        for required in self.passes(free_others):
+            for candidate_room in rooms:
+                if not self.by_room:
+                    free_room = ALL_STARTS
+                elif candidate_room == room:
+                    free_room = occupancy.free_starts(gene, room, ("room",))  # Not cached: the gene is off the index
+                else:
+                    cached = room_free.setdefault(candidate_room, {})
+                    free_room = cached.get(shape)
+                    if free_room is None:
+                        free_room = cached[shape] = occupancy.free_starts(gene, candidate_room, ("room",))
+                if required & free_room & legal:
+                    free = required & free_room
+                    for candidate_start in self.nearest[subject_id][start]:
+                        if free >> candidate_start & 1:
+                            return problem.pack(candidate_start, candidate_room)
+        return None
+
+    # Repair a chromosome in place; returns the number of genes moved.
+    # Booking counts come from one vectorized pass, and only the genes that double-book
+    # something or start outside their legal starts are revisited, in gene order: each is
+    # taken off the index and, unless an earlier move already freed its placement, moved to
+    # the nearest free one. Pinned genes never move; the others move around them.
+    def __call__(self, genes):
+        problem = self.problem
+        counts = {resource: occupancy_counts(problem, genes, resource)[0] for resource in self.resources}
+        clashing = ~self.legal_table[problem.gene_subject, genes // problem.n_rooms]
+        for resource, resource_counts in counts.items():
+            cells = problem.occupied_cells(genes, resource)
+            cell_gene = problem.cell_gene[problem.instructor_slots] if resource == "instructor" else problem.cell_gene
+            clashing[cell_gene[resource_counts.ravel()[cells] > 1]] = True
+        if problem.pinned is not None:
+            clashing &= ~problem.pinned
+        if not clashing.any():
+            return 0
+        occupancy = OccupancyIndex(problem, resources=self.resources)
+        occupancy.load(counts)
+        room_free = {}
+        moved = 0
+        for gene in np.flatnonzero(clashing).tolist():
+            value = int(genes[gene])
+            start, room = divmod(value, problem.n_rooms)
+            occupancy.remove(gene, value)
+            subject_id = problem._gene_subject[gene]
+            legal = self.legal[subject_id] >> start & 1
+            if not legal or occupancy.busy(gene, room) & placement_mask(problem, gene, start):
+                candidate = self.nearest_free(occupancy, gene, value, room_free)
+                if candidate is None and not legal:
+                    # Nothing free: still back to the nearest legal start in its room
+                    candidate = problem.pack(self.nearest[subject_id][start][0], room)
+                if candidate is not None:
+                    genes[gene] = value = candidate
+                    moved += 1
+                    room_free.pop(room, None)
+                    room_free.pop(candidate % problem.n_rooms, None)
+            occupancy.add(gene, value)
+        return moved
+
+    # Conflict-light random chromosome: (section, subject) blocks are placed in random
+    # order, each at the first (start, room) in a random order that is free on all of the
+    # subject's days (for all resources, else for its room); like ProblemInstance.initialize
+    # a block gets one placement for all its days
+    def initialize(self, rng):
+        problem = self.problem
+        genes = np.empty(problem.n_genes, dtype=GENE_DTYPE)
+        occupancy = OccupancyIndex(problem, resources=self.resources)
+        for block_start, block_end, subject_id in rng.sample(problem.blocks, len(problem.blocks)):
+            starts = problem.subject_starts[subject_id]
+            starts = rng.sample(starts, len(starts))
+            rooms = problem.subject_rooms[subject_id]
+            rooms = rng.sample(rooms, len(rooms))
+            value = self.first_free(occupancy, range(block_start, block_end), starts, rooms)
+            for gene in range(block_start, block_end):
+                genes[gene] = value
+                occupancy.add(gene, value)
+        return genes
+
+    # First (start, room) in the given orders free for every gene of a block (relaxed as in
+    # nearest_free); the first candidate when none is
+    def first_free(self, occupancy, block, starts, rooms):
+        free_others = ALL_STARTS
+        free_rooms = [ALL_STARTS] * len(rooms)
+        for gene in block:
+            gene_others, gene_rooms = self.free_starts(occupancy, gene, rooms)
+            free_others &= gene_others
+            free_rooms = [free & gene_free for free, gene_free in zip(free_rooms, gene_rooms)]
+        for required in self.passes(free_others):
+            for start in starts:
+                for room, free_room in zip(rooms, free_rooms):
+                    if (required & free_room) >> start & 1:
+                        return self.problem.pack(start, room)
+        return self.problem.pack(starts[0], rooms[0])
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+# Parent selection strategies for evolve().
+# A strategy is called as strategy(conflicts, count, rng, elite_count) with the ranked
+# population's conflicts (its first elite_count rows sorted best first, the rest in no
+# particular order) and returns an iterable of `count` parent row indices. None of them
+# needs the whole population sorted, except rank selection when the scores spread over far
+# more values than there are individuals (see Rank).
+
+
+# Numpy generator seeded from the run's random.Random, so seeded runs stay reproducible
+def numpy_rng(rng):
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+# Parents drawn uniformly from the elites (the original scheme). Draws are lazy so they
+# interleave with crossover and mutation draws exactly as before.
+class Truncation:
+    def __call__(self, conflicts, count, rng, elite_count):
+        for _ in range(count):
+            yield rng.randrange(elite_count)
+
+
+# Each parent is the best of `size` individuals drawn at random: O(count * size)
+class Tournament:
+    def __init__(self, size=2):
+        self.size = size
+
+    def __call__(self, conflicts, count, rng, elite_count):
+        contestants = numpy_rng(rng).integers(0, len(conflicts), size=(count, self.size))
+        winners = np.argmin(conflicts[contestants], axis=1)
+        return contestants[np.arange(count), winners].tolist()
+
+
+# Fitness-proportional selection with one random draw per parent: O(n + count log n)
+class Roulette:
+    def weights(self, conflicts):
+        return 1 / (1 + conflicts)
+
+    def __call__(self, conflicts, count, rng, elite_count):
+        cumulative = np.cumsum(self.weights(conflicts))
+        draws = numpy_rng(rng).random(count) * cumulative[-1]
+        return np.minimum(np.searchsorted(cumulative, draws, side="right"), len(conflicts) - 1).tolist()
+
+
+# Stochastic universal sampling: fitness-proportional, but `count` evenly spaced pointers
+# share one random offset, so an individual is picked within one of its expected count.
+# Parents are shuffled afterwards so pairs are not neighbours on the wheel.
+class StochasticUniversal(Roulette):
+    def __call__(self, conflicts, count, rng, elite_count):
+        generator = numpy_rng(rng)
+        cumulative = np.cumsum(self.weights(conflicts))
+        step = cumulative[-1] / count
+        pointers = (generator.random() + np.arange(count)) * step
+        parents = np.minimum(np.searchsorted(cumulative, pointers, side="right"), len(conflicts) - 1)
+        return generator.permutation(parents).tolist()
+
+
+# Rank counts ties with a table indexed by score when the scores span fewer than this many
+# values per individual
+RANK_SPAN_FACTOR = 4
+
+
+# Linear ranking: weights fall linearly from `pressure` for the best to 2 - pressure for
+# the worst (1 < pressure <= 2), then stochastic universal sampling. Ties share a rank: the
+# number of individuals with a better score. That is an O(n) counting pass offset by the
+# best score, unless the scores spread too wide for a table (weighted scores can be in the
+# millions); then ranks come from the sorted distinct scores, O(n log n).
+class Rank(StochasticUniversal):
+    def __init__(self, pressure=1.5):
+        self.pressure = pressure
+
+    def weights(self, conflicts):
+        n = len(conflicts)
+        if n == 1:
+            return np.ones(1)
+        best = conflicts.min()
+        if conflicts.max() - best < RANK_SPAN_FACTOR * n:
+            offsets = conflicts - best
+            counts = np.bincount(offsets)
+            rank = (np.cumsum(counts) - counts)[offsets]  # Individuals with fewer conflicts
+        else:
+            _, inverse, counts = np.unique(conflicts, return_inverse=True, return_counts=True)
+            rank = (np.cumsum(counts) - counts)[inverse]
+        return (2 - self.pressure) + 2 * (self.pressure - 1) * (n - 1 - rank) / (n - 1)
+
+
+# Strategies selectable by name
+SELECTIONS = {
+    "truncation": Truncation,
+    "tournament": Tournament,
+    "roulette": Roulette,
+    "sus": StochasticUniversal,
+    "rank": Rank,
+}
+
+
+# Strategy for a name in SELECTIONS (default settings) or a strategy callable, used as is
+def make_selection(selection):
+    if callable(selection):
+        return selection
+    if selection not in SELECTIONS:
+        raise ValueError(f"Unknown selection strategy: {selection}")
+    return SELECTIONS[selection]()
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ga_batch import JOB_DEFAULTS, check_settings, solve_job, worker_problem
+from ga_export import export_schedule
+from ga_loader import catalog_from_data
+
+
+# Job states; the last three are final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+# Problem keys of a job request; every other key is a JOB_DEFAULTS setting
+CATALOG_KEYS = ("subjects", "sections", "rooms")
+
+# Exported files a finished job can be downloaded as
+RESULT_FILES = {"schedule.xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                "schedule.csv": "text/csv"}
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Progress callback run inside the worker: forwards a compact record to the service when
+# the best score improves or every `interval` seconds, and stops the run (by raising
+# JobCancelled) once the job's cancel flag is set; the flag is only checked as often,
+# since it lives in the manager process
+class ProgressReporter:
+    def __init__(self, job_id, progress, cancelled, interval=0.2):
+        self.job_id = job_id
+        self.progress = progress
+        self.cancelled = cancelled
+        self.interval = interval
+        self.best = None
+        self.last = 0.0
+
+    def __call__(self, record):
+        now = time.perf_counter()
+        improved = self.best is None or record["best_conflicts"] < self.best
+        if not improved and now - self.last < self.interval:
+            return
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.best = record["best_conflicts"]
+        self.last = now
+        self.progress.put((self.job_id, {"generation": record["generation"],
+                                         "best_conflicts": int(record["best_conflicts"]),
+                                         "best_fitness": record["best_fitness"], "elapsed": record["elapsed"]}))
+
+
+# Solve one job in a pool process and export it to output_dir/<job id>/; returns its summary.
+# The compiled problem is kept by catalog hash (see ga_batch.worker_problem), so the same
+# catalog posted again (another seed or budget) skips the compile step.
+def _run_service_job(job_id, catalog, key, settings, output_dir, progress, cancelled):
+    problem = worker_problem(settings, key, lambda: catalog)
+    result = solve_job(problem, settings, ProgressReporter(job_id, progress, cancelled))
+    directory = os.path.join(output_dir, job_id)
+    os.makedirs(directory, exist_ok=True)
+    export_schedule(problem, result.genes, os.path.join(directory, "schedule.xlsx"),
+                    csv_path=os.path.join(directory, "schedule.csv"))
+    return {"genes": problem.n_genes, "conflicts": result.conflicts, "fitness": result.fitness,
+            "terms": result.terms, "generations": result.generations, "stop_reason": result.stop_reason,
+            "elapsed": result.elapsed}
+
+
+# A submitted job as the service sees it: its settings, state, latest progress record and
+# result summary; subscribers are the event queues of the clients streaming it.
+class ServiceJob:
+    def __init__(self, job_id, catalog, key, settings, cancelled):
+        self.id = job_id
+        self.catalog = catalog
+        self.key = key
+        self.settings = settings
+        self.cancelled = cancelled
+        self.status = QUEUED
+        self.progress = None
+        self.summary = None
+        self.error = None
+        self.submitted = time.time()
+        self.subscribers = set()
+
+    def state(self):
+        return {"id": self.id, "status": self.status, "progress": self.progress, "result": self.summary,
+                "error": self.error, "submitted": self.submitted}
+
+    def publish(self, event, data):
+        for subscriber in self.subscribers:
+            subscriber.put_nowait((event, data))
+
+
+# Job queue in front of a process pool. Jobs wait in an asyncio.Queue and `workers`
+# dispatcher tasks feed them to the pool one at a time each, so a queued job can still be
+# cancelled without touching the pool. The pool and the compiled problems in its processes
+# stay up between jobs. Its processes are spawned, not forked: a fork on the first job would
+# copy that job's open client connection into the worker and keep it from ever closing.
+# Progress records come back through a manager queue, read on a thread and fanned out to
+# the job's subscribers. Every job's time_budget is capped at max_time_budget seconds when
+# that is set. Only the last keep_jobs finished jobs are kept: older ones are forgotten and
+# their result files deleted.
+class SchedulingService:
+    def __init__(self, output_dir="service_output", workers=None, max_time_budget=None, keep_jobs=100):
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.max_time_budget = max_time_budget
+        self.keep_jobs = keep_jobs
+        self.jobs = {}
+        self.finished = deque()  # Ids of finished jobs, oldest first
+        self.queue = None
+        self.tasks = []
+        self.executor = None
+        self.manager = None
+        self.progress = None
+
+    async def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.manager = multiprocessing.Manager()
+        self.progress = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.read_progress()))
+
+    async def stop(self):
+        for job in self.jobs.values():
+            if job.status not in FINAL_STATES:
+                job.cancelled.set()
+        self.progress.put(None)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    # Validate a job request and queue it; raises ValueError for a bad request
+    def submit(self, request):
+        unknown = [key for key in request if key not in CATALOG_KEYS and key not in JOB_DEFAULTS]
+        if unknown:
+            raise ValueError(f"Unknown job settings: {', '.join(sorted(unknown))}")
+        problem = {key: request[key] for key in CATALOG_KEYS if key in request}
+        settings = {**JOB_DEFAULTS, **{key: value for key, value in request.items() if key not in CATALOG_KEYS}}
+        check_settings(settings)
+        if self.max_time_budget is not None:
+            settings["time_budget"] = min(settings["time_budget"] or self.max_time_budget, self.max_time_budget)
+        catalog = catalog_from_data(problem)
+        key = hashlib.blake2b(json.dumps(problem, sort_keys=True).encode(), digest_size=16).hexdigest()
+        job = ServiceJob(uuid.uuid4().hex[:12], catalog, key, settings, self.manager.Event())
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        return job
+
+    # Cancel a queued or running job; returns False when it had already finished
+    def cancel(self, job):
+        if job.status in FINAL_STATES:
+            return False
+        job.cancelled.set()
+        if job.status == QUEUED:
+            self.finish(job, CANCELLED)
+        return True
+
+    def finish(self, job, status, summary=None, error=None):
+        job.status = status
+        job.summary = summary
+        job.error = error
+        job.publish(status, job.state())
+        self.finished.append(job.id)
+        while len(self.finished) > self.keep_jobs:
+            old = self.jobs.pop(self.finished.popleft())
+            shutil.rmtree(os.path.join(self.output_dir, old.id), ignore_errors=True)
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            if job.status != QUEUED:
+                continue  # Cancelled while queued
+            job.status = RUNNING
+            job.publish(RUNNING, job.state())
+            try:
+                summary = await loop.run_in_executor(self.executor, _run_service_job, job.id, job.catalog, job.key,
+                                                     job.settings, self.output_dir, self.progress, job.cancelled)
+            except JobCancelled:
+                self.finish(job, CANCELLED)
+            except Exception as error:
+                self.finish(job, FAILED, error=f"{type(error).__name__}: {error}")
+            else:
+                self.finish(job, DONE, summary)
+            job.catalog = None  # Only needed to start the job
+
+    async def read_progress(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self.progress.get)
+            if item is None:
+                return
+            job_id, record = item
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == RUNNING:
+                job.progress = record
+                job.publish("progress", record)
+
+    def result_path(self, job, name):
+        return os.path.join(self.output_dir, job.id, name)
+
+
+# Minimal HTTP/1.1 request reader: (method, path, body bytes); one request per connection
+async def read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) < 2:
+        raise ValueError("Malformed request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise OverflowError()
+    body = await reader.readexactly(length) if length else b""
+    return request_line[0].upper(), request_line[1].split("?", 1)[0], body
+
+
+async def respond(writer, status, body=None, content_type="application/json"):
+    if content_type == "application/json":
+        body = json.dumps(body).encode()
+    writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+# Server-sent events of one job: its current state, then every progress record, until a
+# final event (done, failed or cancelled) or the client leaves
+async def stream_events(service, job, writer):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                 b"Connection: close\r\n\r\n")
+    events = asyncio.Queue()
+    job.subscribers.add(events)
+    try:
+        event = job.status if job.status in FINAL_STATES else "state"
+        writer.write(f"event: {event}\ndata: {json.dumps(job.state())}\n\n".encode())
+        await writer.drain()
+        while event not in FINAL_STATES:
+            event, data = await events.get()
+            writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            await writer.drain()
+    finally:
+        job.subscribers.discard(events)
+
+
+# Routes:
+#   POST   /jobs                      queue a job: {"subjects": [...], "sections": [...],
+#                                     "rooms": {...}, GA settings (ga_batch.JOB_DEFAULTS)}
+#   GET    /jobs                      every job's state
+#   GET    /jobs/<id>                 one job's state, progress and result summary
+#   GET    /jobs/<id>/events          progress as server-sent events
+#   GET    /jobs/<id>/schedule.xlsx   exported schedule (also schedule.csv)
+#   DELETE /jobs/<id>                 cancel
+async def handle(service, reader, writer):
+    try:
+        try:
+            method, path, body = await read_request(reader)
+        except OverflowError:
+            await respond(writer, 413, {"error": "Request body too large"})
+            return
+        except (ValueError, asyncio.IncompleteReadError):
+            await respond(writer, 400, {"error": "Malformed request"})
+            return
+        parts = [part for part in path.split("/") if part]
+        if parts == ["jobs"]:
+            if method == "POST":
+                try:
+                    request = json.loads(body or b"{}")
+                    if not isinstance(request, dict):
+                        raise ValueError("The request body must be a JSON object")
+                    job = service.submit(request)
+                except (ValueError, TypeError, AttributeError, KeyError) as error:
+                    await respond(writer, 400, {"error": str(error)})
+                    return
+                await respond(writer, 202, job.state())
+            elif method == "GET":
+                await respond(writer, 200, [job.state() for job in service.jobs.values()])
+            else:
+                await respond(writer, 405, {"error": "Use GET or POST"})
+            return
+        job = service.jobs.get(parts[1]) if len(parts) in (2, 3) and parts[0] == "jobs" else None
+        if job is None:
+            await respond(writer, 404, {"error": "No such job"})
+        elif len(parts) == 2 and method == "GET":
+            await respond(writer, 200, job.state())
+        elif len(parts) == 2 and method == "DELETE":
+            if service.cancel(job):
+                await respond(writer, 202, job.state())
+            else:
+                await respond(writer, 409, {"error": f"The job is already {job.status}"})
+        elif len(parts) == 2:
+            await respond(writer, 405, {"error": "Use GET or DELETE"})
+        elif parts[2] == "events" and method == "GET":
+            await stream_events(service, job, writer)
+        elif parts[2] in RESULT_FILES and method == "GET":
+            if job.status != DONE:
+                await respond(writer, 409, {"error": f"The job is {job.status}"})
+            else:
+                with open(service.result_path(job, parts[2]), "rb") as handle:
+                    await respond(writer, 200, handle.read(), RESULT_FILES[parts[2]])
+        else:
+            await respond(writer, 404, {"error": "Not found"})
+    except ConnectionError:
+        pass
+    except Exception as error:
+        try:
+            await respond(writer, 500, {"error": f"{type(error).__name__}: {error}"})
+        except ConnectionError:
+            pass
+    finally:
+        writer.close()
+
+
+# Run the service on host:port, or on a Unix socket when unix_path is given, until cancelled
+async def serve(host="127.0.0.1", port=8765, unix_path=None, output_dir="service_output", workers=None,
+                max_time_budget=None, keep_jobs=100, ready=None):
+    service = SchedulingService(output_dir, workers, max_time_budget, keep_jobs)
+    await service.start()
+
+    async def on_connection(reader, writer):
+        await handle(service, reader, writer)
+
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(on_connection, unix_path)
+    else:
+        server = await asyncio.start_server(on_connection, host, port)
+    try:
+        async with server:
+            if ready is not None:
+                ready(server)
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local timetabling service: queue GA jobs over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--output", default="service_output")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-time-budget", type=float, default=None)
+    parser.add_argument("--keep-jobs", type=int, default=100, help="finished jobs (and result files) to keep")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.output, args.workers, args.max_time_budget,
+                          args.keep_jobs))
+    except KeyboardInterrupt:
+        pass
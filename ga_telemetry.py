@@ -0,0 +1,90 @@
+import cProfile
+import json
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# Phases of a generation timed by evolve()
+PHASES = ("evaluation", "selection", "crossover", "mutation", "repair", "local_search")
+
+
+# Mean fraction of genes in which the population differs from its best individual
+# (population ranked best first): 0 when every chromosome is identical
+def population_diversity(population):
+    population = np.asarray(population)
+    return float(np.mean(population[1:] != population[0])) if len(population) > 1 else 0.0
+
+
+# Per-generation record passed to evolve()'s on_generation callback.
+# population/conflicts are the scored population, ranked best first; phase_times holds
+# the seconds this generation spent in each of PHASES. In a warm-started run, moved holds
+# each individual's genes moved from the reference and churn_weight their weight: conflicts
+# and fitness are reported without that churn, like GAResult, and "churn" is the best
+# individual's moved genes (GAResult.churn).
+def generation_record(generation, population, conflicts, cache, phase_times, elapsed, evaluations, moved=0,
+                      churn_weight=0):
+    moved = np.broadcast_to(moved, len(conflicts)).tolist()
+    conflicts = [score - churn_weight * count for score, count in zip(conflicts, moved)]
+    fitness = [1 / (1 + score) for score in conflicts]
+    return {
+        "generation": generation,
+        "best_conflicts": conflicts[0],
+        "churn": moved[0],
+        "best_fitness": fitness[0],
+        "mean_fitness": sum(fitness) / len(fitness),
+        "worst_fitness": min(fitness),
+        "diversity": population_diversity(population),
+        "evaluations": evaluations,
+        "cache_hit_rate": cache.hit_rate,
+        "phase_times": phase_times,
+        "elapsed": elapsed,
+    }
+
+
+# Streams generation records to a JSON Lines file, one flushed line per generation,
+# so a run can be followed (tail -f) or plotted without re-running it.
+# Usable directly as on_generation.
+class JsonlWriter:
+    def __init__(self, path, **fields):
+        self.file = open(path, "w")
+        self.fields = fields  # Constant fields added to every record, e.g. island=2
+
+    def __call__(self, record):
+        self.file.write(json.dumps({**self.fields, **record}) + "\n")
+        self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+
+# Calls every callback with the same record
+class Callbacks:
+    def __init__(self, *callbacks):
+        self.callbacks = [callback for callback in callbacks if callback is not None]
+
+    def __call__(self, record):
+        for callback in self.callbacks:
+            callback(record)
+
+
+# Runs the body under cProfile and dumps the stats to path (read with pstats);
+# does nothing when path is None
+@contextmanager
+def profiled(path):
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -1,5 +1,4 @@
 import random
-import pandas as pd
 
 
 # Define classes and data structures
@@ -109,6 +108,8 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
 
 
 def export_to_excel(schedule, filename="schedule.xlsx"):
+    import pandas as pd  # Only needed to export
+
     time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
 
@@ -121,14 +122,15 @@ def export_to_excel(schedule, filename="schedule.xlsx"):
     print(f"Schedule saved to {filename}")
 
 
-# Example usage
-subjects = [
-    Subject("CS101", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Wednesday", "Friday"],
-            ["CB 223", "CB 224"], ["Instructor A", "Instructor B"], 30),
-    Subject("CS102", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Thursday", 'Saturday'], ["CB 226", "CB 227"],
-            ["Instructor B", "Instructor C"], 25),
-    # Add more subjects as needed
-]
+if __name__ == "__main__":
+    # Example usage
+    subjects = [
+        Subject("CS101", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Wednesday", "Friday"],
+                ["CB 223", "CB 224"], ["Instructor A", "Instructor B"], 30),
+        Subject("CS102", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Thursday", 'Saturday'], ["CB 226", "CB 227"],
+                ["Instructor B", "Instructor C"], 25),
+        # Add more subjects as needed
+    ]
 
-best_schedule = genetic_algorithm(subjects)
-export_to_excel(best_schedule)
+    best_schedule = genetic_algorithm(subjects)
+    export_to_excel(best_schedule)
@@ -0,0 +1,142 @@
+import csv
+import re
+
+import numpy as np
+
+from ga_export import sheet_title
+from ga_problem import DAYS, GENE_DTYPE, SLOT_INDEX, ProblemInstance
+
+
+# One entry of an exported cell: "Section - CODE (Room)" in single-sheet exports,
+# "CODE (Room)" on the per-section sheets of ga_export, which add " at HH:MM" to entries
+# sharing a block that starts earlier; instructor lines don't match
+ENTRY = re.compile(r"^(?:(?P<section>.+?) - )?(?P<code>\S+) \((?P<room>[^()]*)\)(?: at (?P<start>\d\d:\d\d))?$")
+
+
+# Reference chromosome of a problem from a previous schedule: a saved chromosome (.npy,
+# same gene layout), the flat CSV side output of ga_export, or an exported workbook
+# (ga_export's per-section sheets or the single-sheet ga3.2 export). Genes the source
+# doesn't place, or places at a start time or room the problem doesn't know, are -1.
+def read_schedule(problem, source):
+    if isinstance(source, np.ndarray) or str(source).lower().endswith(".npy"):
+        genes = np.asarray(np.load(source) if not isinstance(source, np.ndarray) else source, dtype=GENE_DTYPE)
+        if genes.shape != (problem.n_genes,):
+            raise ValueError("The saved chromosome doesn't match the problem's genes")
+        genes = genes.copy()
+        genes[(genes < 0) | (genes >= problem.pack(len(SLOT_INDEX), 0))] = -1
+        return genes
+    if str(source).lower().endswith(".csv"):
+        placements = csv_placements(source)
+    else:
+        placements = workbook_placements(problem, source)
+    genes = np.full(problem.n_genes, -1, dtype=GENE_DTYPE)
+    gene_index = {key: gene for gene, key in enumerate(problem.gene_keys)}
+    for (section, code, day), (start_time, room) in placements:
+        key = (code, day) if problem.sections is None else (section, code, day)
+        gene = gene_index.get(key)
+        start = SLOT_INDEX.get(start_time)
+        room_id = problem.room_index.get(room)
+        if gene is not None and start is not None and room_id is not None:
+            genes[gene] = problem.pack(start, room_id)
+    return genes
+
+
+# ((section, code, day), (start, room)) rows of a ga_export CSV
+def csv_placements(path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            yield (row["section"] or None, row["subject"], row["day"]), (row["start"], row["room"])
+
+
+# ((section, code, day), (start, room)) of every entry of an exported workbook. Room and
+# instructor sheets of ga_export repeat the section sheets and are skipped.
+def workbook_placements(problem, path):
+    from openpyxl import load_workbook
+
+    used = set()
+    section_sheets = {sheet_title("section", name, used): name for name in problem.section_names}
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            if sheet.title in section_sheets:
+                sheet_section = section_sheets[sheet.title]
+            elif sheet.title[:2] in ("R-", "I-"):
+                continue
+            else:
+                sheet_section = None
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            day_columns = [(column, day) for column, day in enumerate(header) if day in DAYS]
+            for row in rows:
+                if not row or row[0] is None:
+                    continue
+                start_time = str(row[0])[:5]
+                for column, day in day_columns:
+                    text = row[column] if column < len(row) else None
+                    for line in str(text).split("\n") if text else ():
+                        match = ENTRY.match(line.strip())
+                        if match:
+                            section = sheet_section if sheet_section is not None else match["section"]
+                            yield (section, match["code"], day), (match["start"] or start_time, match["room"])
+    finally:
+        workbook.close()
+
+
+# Placed genes of a reference schedule at a start outside their instructor's availability
+# or in a room their subject can't use
+def invalid_genes(problem, reference):
+    invalid = np.zeros(problem.n_genes, dtype=bool)
+    starts, rooms = problem.unpack(reference)
+    for gene, start, room in zip(np.flatnonzero(reference >= 0).tolist(), starts[reference >= 0].tolist(),
+                                 rooms[reference >= 0].tolist()):
+        subject_id = problem._gene_subject[gene]
+        if start not in problem.subject_starts[subject_id] or room not in problem.subject_rooms[subject_id]:
+            invalid[gene] = True
+    return invalid
+
+
+# Genes of a reference schedule that have to move: those it doesn't place, those at a
+# start outside their instructor's availability or in a room their subject can't use,
+# those double-booking a counted resource or over a room's capacity (when counted), and
+# every gene of the given instructors. neighbors=True also frees the genes sharing a
+# counted room, instructor or section on the same day as one of those, to make room.
+def affected_genes(problem, reference, instructors=(), neighbors=False):
+    placed = reference >= 0
+    affected = ~placed | invalid_genes(problem, reference)
+    _, rooms = problem.unpack(np.where(placed, reference, 0))
+    legal = placed & ~affected
+    values = np.where(legal, reference, 0)
+    for resource in problem.conflict_types:
+        cells = problem.occupied_cells(values, resource)
+        owners = problem.cell_gene[problem.instructor_slots] if resource == "instructor" else problem.cell_gene
+        booked = legal[owners]
+        counts = np.bincount(cells[booked], minlength=cells.max(initial=0) + 1)
+        affected[owners[booked & (counts[cells] > 1)]] = True
+    if "capacity" in problem.weights:
+        affected |= legal & (problem.over_capacity[np.arange(problem.n_genes), rooms] > 0)
+    for instructor in instructors:
+        if instructor in problem.instructor_index:
+            affected |= problem.gene_instructor == problem.instructor_index[instructor]
+    if neighbors and affected.any():
+        for resource in problem.conflict_types:
+            ids = rooms if resource == "room" else \
+                problem.gene_instructor if resource == "instructor" else problem.gene_section
+            keys = ids * len(DAYS) + problem.gene_day
+            affected |= placed & (ids >= 0) & np.isin(keys, keys[affected & placed & (ids >= 0)])
+    return affected
+
+
+# Warm-start version of a problem: scored like it plus churn_weight per gene moved away
+# from the reference schedule read from `source` (see read_schedule), with every gene
+# pinned to its reference placement except the affected ones (see affected_genes).
+# Invalid placements are dropped from the reference: those genes must move, so moving them
+# is not churn. When nothing is affected no gene is pinned and churn alone holds the
+# schedule in place.
+def warm_problem(problem, source, churn_weight=1, instructors=(), neighbors=False):
+    reference = read_schedule(problem, source)
+    affected = affected_genes(problem, reference, instructors, neighbors)
+    reference[invalid_genes(problem, reference)] = -1
+    weights = dict(problem.weights, churn=churn_weight)
+    return ProblemInstance(problem.subjects, problem.sections, (), weights, problem.room_capacity,
+                           problem.late_start, problem.max_day_span, reference,
+                           ~affected if affected.any() else None)
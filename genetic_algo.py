@@ -1,5 +1,4 @@
 import random
-import pandas as pd
 
 
 # Define classes and data structures
@@ -104,6 +103,8 @@ def genetic_algorithm(subjects, population_size=100, generations=1000):
 
 
 def export_to_excel(schedule, filename="schedule.xlsx"):
+    import pandas as pd  # Only needed to export
+
     time_slots = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 30)]
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
 
@@ -117,16 +118,17 @@ def export_to_excel(schedule, filename="schedule.xlsx"):
     print(f"Schedule saved to {filename}")
 
 
-# Example usage
-subjects = [
-    Subject("CS101", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Thursday"], ["Room 101", "Room 102"],
-            ["Instructor A", "Instructor B"], 30),
-    Subject("CS102", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Friday"], ["Room 103", "Room 104"],
-            ["Instructor B", "Instructor C"], 25),
-    Subject("CS103", "Algorithms", ["07:30", "09:00", "15:00"], ["Wednesday"], ["Room 105", "Room 106"],
-            ["Instructor A", "Instructor D"], 20),
-    # Add more subjects as needed
-]
-
-best_schedule = genetic_algorithm(subjects)
-export_to_excel(best_schedule)
+if __name__ == "__main__":
+    # Example usage
+    subjects = [
+        Subject("CS101", "Intro to CS", ["08:00", "10:00", "14:00"], ["Monday", "Thursday"], ["Room 101", "Room 102"],
+                ["Instructor A", "Instructor B"], 30),
+        Subject("CS102", "Data Structures", ["09:00", "11:00", "13:00"], ["Tuesday", "Friday"], ["Room 103", "Room 104"],
+                ["Instructor B", "Instructor C"], 25),
+        Subject("CS103", "Algorithms", ["07:30", "09:00", "15:00"], ["Wednesday"], ["Room 105", "Room 106"],
+                ["Instructor A", "Instructor D"], 20),
+        # Add more subjects as needed
+    ]
+
+    best_schedule = genetic_algorithm(subjects)
+    export_to_excel(best_schedule)
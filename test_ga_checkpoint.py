@@ -0,0 +1,38 @@
+import random
+
+import numpy as np
+import pytest
+
+from ga_checkpoint import Checkpoint
+from ga_engine import StoppingCriteria, evolve
+from ga_repair import Repair
+
+
+# Options of each evolve() path a snapshot has to carry through
+PATHS = {
+    "default": lambda problem: {},
+    "tournament": lambda problem: {"selection": "tournament"},
+    "local_search": lambda problem: {"local_search": "steepest"},
+    "repair": lambda problem: {"repair": Repair(problem), "initializer": Repair(problem).initialize},
+}
+
+
+def run(problem, generations, path, **options):
+    return evolve(problem, 20, generations, random.Random(7), stopping=StoppingCriteria(None, 1000), **options,
+                  **PATHS[path](problem))
+
+
+# A run checkpointed at generation 10, stopped at 15 and resumed to 30 ends exactly like an
+# uninterrupted 30-generation run
+@pytest.mark.parametrize("path", sorted(PATHS))
+def test_resumed_run_matches_uninterrupted_run(synthetic_problem, tmp_path, path):
+    problem = synthetic_problem(100, seed=4)
+    snapshot = str(tmp_path / "run.npz")
+    uninterrupted = run(problem, 30, path)
+    checkpoint = Checkpoint(snapshot, every=10, seconds=None)
+    run(problem, 15, path, checkpoint=checkpoint)
+    assert checkpoint.saves == 1
+    resumed = run(problem, 30, path, resume_from=snapshot)
+    assert np.array_equal(resumed.genes, uninterrupted.genes)
+    assert resumed.conflicts == uninterrupted.conflicts
+    assert resumed.generations == uninterrupted.generations
@@ -0,0 +1,24 @@
+import pytest
+
+from ga_cli import build_parser
+from ga_local_search import LocalSearch
+from ga_operators import CROSSOVERS
+from ga_selection import SELECTIONS
+
+
+# The CLI lists the names without importing the GA modules, so every registered name has
+# to be accepted as given
+@pytest.mark.parametrize("option, names", [("--selection", SELECTIONS), ("--crossover", CROSSOVERS),
+                                           ("--local-search", LocalSearch.METHODS)])
+def test_solve_accepts_every_registered_name(option, names):
+    for name in names:
+        args = build_parser().parse_args(["solve", "catalog.csv", option, name])
+        assert getattr(args, option[2:].replace("-", "_")) == name
+
+
+@pytest.mark.parametrize("option", ["--selection", "--crossover", "--local-search"])
+def test_unknown_names_are_usage_errors(option, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(["solve", "catalog.csv", option, "bogus"])
+    assert exit_info.value.code == 2
+    assert "invalid choice" in capsys.readouterr().err
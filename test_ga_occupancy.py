@@ -0,0 +1,62 @@
+import random
+
+from ga_fitness import evaluate_population, term_counts
+from ga_occupancy import OccupancyIndex, ScoreIndex
+from ga_problem import RESOURCES, TERMS
+
+
+# Problem scoring every term of ga_problem.TERMS with distinct weights
+def all_terms_problem(synthetic_problem):
+    base = synthetic_problem(120, seed=2)
+    rng = random.Random(5)
+    room_capacity = {room: rng.randint(15, 45) for room in base.room_names}
+    reference = base.initialize(random.Random(6))
+    weights = {term: weight for weight, term in enumerate(TERMS, 1)}
+    return synthetic_problem(120, seed=2, conflict_types=RESOURCES, weights=weights, room_capacity=room_capacity,
+                             late_start="15:00", max_day_span=6, reference=reference)
+
+
+def test_score_index_matches_term_counts_after_random_moves(synthetic_problem):
+    problem = all_terms_problem(synthetic_problem)
+    rng = random.Random(0)
+    genes = problem.initialize(rng)
+    index = ScoreIndex(problem, genes)
+    for step in range(3000):
+        gene, value = problem.random_move(rng)
+        index.move(gene, genes[gene], value)
+        genes[gene] = value
+        if step % 100 == 0:
+            expected = {term: int(counts[0]) for term, counts in term_counts(problem, genes).items()}
+            assert index.terms == expected
+            assert index.conflicts == int(evaluate_population(problem, genes)[0])
+
+
+def test_delta_leaves_the_index_untouched(synthetic_problem):
+    problem = all_terms_problem(synthetic_problem)
+    rng = random.Random(1)
+    genes = problem.initialize(rng)
+    index = ScoreIndex(problem, genes)
+    for _ in range(200):
+        gene, value = problem.random_move(rng)
+        before = index.conflicts
+        change = index.delta(gene, genes[gene], value)
+        assert index.conflicts == before
+        moved = genes.copy()
+        moved[gene] = value
+        assert change == int(evaluate_population(problem, moved)[0]) - before
+
+
+# The vectorized load of a whole chromosome builds the same counters as adding its genes
+# one by one
+def test_occupancy_index_load_matches_gene_by_gene_adds(synthetic_problem):
+    problem = synthetic_problem(200, seed=3, conflict_types=RESOURCES)
+    rng = random.Random(2)
+    for _ in range(10):
+        genes = problem.initialize(rng)
+        loaded = OccupancyIndex(problem, genes)
+        added = OccupancyIndex(problem)
+        for gene, value in enumerate(genes.tolist()):
+            added.add(gene, value)
+        assert loaded.planes == added.planes
+        assert loaded.conflicts_by_type == added.conflicts_by_type
+        assert loaded.conflicts == int(evaluate_population(problem, genes)[0])
@@ -0,0 +1,30 @@
+import glob
+import multiprocessing
+import threading
+
+from ga_engine import StoppingCriteria
+from ga_parallel import run_islands
+
+
+# Islands that stop at different generations: the one still running keeps sending
+# migrant batches (each bigger than a pipe buffer here) to the one that stopped, and
+# run_islands must still return
+def test_islands_stopping_at_different_generations_finish(synthetic_problem, tmp_path):
+    problem = synthetic_problem(2000)
+    telemetry = str(tmp_path / "runs.jsonl")
+    results = []
+    run = threading.Thread(target=lambda: results.append(run_islands(
+        problem, 2, population_size=30, generations=200, migration_interval=1, migrants=20, seed=0,
+        stopping=StoppingCriteria(None, 3), telemetry=telemetry)), daemon=True)
+    run.start()
+    run.join(60)
+    if run.is_alive():
+        for process in multiprocessing.active_children():
+            process.terminate()
+    assert not run.is_alive(), "run_islands hung after one island stopped"
+    generations = []
+    for path in sorted(glob.glob(str(tmp_path / "runs.island*.jsonl"))):
+        with open(path) as records:
+            generations.append(sum(1 for _ in records))
+    assert len(set(generations)) == 2
+    assert results[0].stop_reason == "stall"